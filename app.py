@@ -1,15 +1,27 @@
-from flask import Flask, render_template, request, flash, redirect, url_for, jsonify, session
-from extensions import db, make_celery
-import os, uuid
+from flask import Flask, render_template, request, flash, redirect, url_for, jsonify, session, Response, stream_with_context, g
+from extensions import db, make_celery, get_redis
+import os, sys, time, uuid, hashlib, json, threading
+from datetime import datetime
+import click
 from dotenv import load_dotenv
+from werkzeug.datastructures import MultiDict
 
-import tasks # Import the entire tasks module
-from repositories.product_repository import ProductRepository
+import task_names # Tasks are sent by name; tasks.py (pandas, requests) loads only in workers
+from bulk_actions import BULK_ACTIONS, apply_bulk_action
+from repositories.product_repository import ProductRepository, API_FIELDS
 from repositories.webhook_repository import WebhookRepository
+from repositories.imported_file_repository import ImportedFileRepository
+from repositories.outbox_repository import OutboxRepository
+from uploads import UploadSpool, UploadRequest
+from csv_export import iter_csv_export, iter_ndjson_export
+from progress import iter_progress_events
+from metrics import record_request, render_metrics
 
 load_dotenv()
 
 app = Flask(__name__)
+# Stream uploads straight into UPLOAD_FOLDER instead of a temp file that is copied later
+app.request_class = UploadRequest
 
 # --- CONFIGURATION ---
 app.config.update(
@@ -17,16 +29,81 @@ app.config.update(
     UPLOAD_FOLDER=os.path.join(os.getcwd(), "uploads"),
     SECRET_KEY=os.environ.get("SECRET_KEY", "super_secret_dev_key"), # IMPORTANT: A strong secret key is required for session security
     CELERY_BROKER_URL=os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0"),
-    CELERY_RESULT_BACKEND=os.environ.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    CELERY_RESULT_BACKEND=os.environ.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0"),
+    REDIS_URL=os.environ.get("REDIS_URL", os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")),
+    # Socket timeouts (seconds) of the app's Redis client (cache, progress, metrics); keep them short,
+    # these calls run on every request
+    REDIS_SOCKET_TIMEOUT=float(os.environ.get("REDIS_SOCKET_TIMEOUT", 1)),
+    REDIS_CONNECT_TIMEOUT=float(os.environ.get("REDIS_CONNECT_TIMEOUT", 1)),
+    # Commit each import chunk with a checkpoint so a retried import resumes where it stopped
+    IMPORT_RESUMABLE=os.environ.get("IMPORT_RESUMABLE", "false").lower() == "true",
+    # Resumable imports are redelivered after a worker crash at most this many times in total
+    IMPORT_MAX_DELIVERIES=int(os.environ.get("IMPORT_MAX_DELIVERIES", 3)),
+    # Seconds before Redis redelivers an unacknowledged task; must exceed the longest import
+    CELERY_VISIBILITY_TIMEOUT=int(os.environ.get("CELERY_VISIBILITY_TIMEOUT", 12 * 3600)),
+    # Split uploads of at least IMPORT_SHARD_MIN_BYTES into this many shards imported in parallel
+    IMPORT_SHARDS=int(os.environ.get("IMPORT_SHARDS", 1)),
+    IMPORT_SHARD_MIN_BYTES=int(os.environ.get("IMPORT_SHARD_MIN_BYTES", 50 * 1024 * 1024)),
+    # Concurrent webhook delivery: pool size, per-host connection limit and timeouts (seconds)
+    WEBHOOK_MAX_WORKERS=int(os.environ.get("WEBHOOK_MAX_WORKERS", 16)),
+    WEBHOOK_PER_HOST_LIMIT=int(os.environ.get("WEBHOOK_PER_HOST_LIMIT", 4)),
+    WEBHOOK_CONNECT_TIMEOUT=float(os.environ.get("WEBHOOK_CONNECT_TIMEOUT", 3)),
+    WEBHOOK_TIMEOUT=float(os.environ.get("WEBHOOK_TIMEOUT", 10)),
+    WEBHOOK_TEST_TIMEOUT=float(os.environ.get("WEBHOOK_TEST_TIMEOUT", 5)),
+    # Products listing pagination: 'offset' (page numbers, exact count) or 'keyset' (cursor, approximate count)
+    PRODUCTS_PAGINATION=os.environ.get("PRODUCTS_PAGINATION", "offset"),
+    # Opt-in batching of product events: buffer for this many seconds (0 = one delivery per event)
+    # or until WEBHOOK_BATCH_MAX_EVENTS events, then deliver one array payload per subscriber
+    WEBHOOK_BATCH_WINDOW=float(os.environ.get("WEBHOOK_BATCH_WINDOW", 0)),
+    WEBHOOK_BATCH_MAX_EVENTS=int(os.environ.get("WEBHOOK_BATCH_MAX_EVENTS", 100)),
+    # Seconds between runs of the outbox relay (product change events -> webhooks)
+    OUTBOX_RELAY_INTERVAL=float(os.environ.get("OUTBOX_RELAY_INTERVAL", 2)),
+    # Circuit breaker: after WEBHOOK_BREAKER_THRESHOLD consecutive failed deliveries an endpoint
+    # is skipped for WEBHOOK_BREAKER_COOLDOWN seconds and its deliveries are parked for retry
+    WEBHOOK_BREAKER_THRESHOLD=int(os.environ.get("WEBHOOK_BREAKER_THRESHOLD", 5)),
+    WEBHOOK_BREAKER_COOLDOWN=int(os.environ.get("WEBHOOK_BREAKER_COOLDOWN", 300)),
+    # Retries of failed/parked deliveries: exponential backoff with jitter (seconds)
+    WEBHOOK_RETRY_MAX_ATTEMPTS=int(os.environ.get("WEBHOOK_RETRY_MAX_ATTEMPTS", 8)),
+    WEBHOOK_RETRY_BASE_DELAY=float(os.environ.get("WEBHOOK_RETRY_BASE_DELAY", 10)),
+    WEBHOOK_RETRY_MAX_DELAY=float(os.environ.get("WEBHOOK_RETRY_MAX_DELAY", 3600)),
+    # Days of webhook delivery history kept in webhook_delivery
+    WEBHOOK_DELIVERY_RETENTION_DAYS=int(os.environ.get("WEBHOOK_DELIVERY_RETENTION_DAYS", 30)),
+    # Bulk product actions matching more products than this run as a Celery task
+    BULK_ASYNC_THRESHOLD=int(os.environ.get("BULK_ASYNC_THRESHOLD", 10000)),
+    # "Delete All" empties the table with TRUNCATE instead of id-range batches (PostgreSQL)
+    PRODUCTS_DELETE_ALL_TRUNCATE=os.environ.get("PRODUCTS_DELETE_ALL_TRUNCATE", "false").lower() == "true",
+    # Progress streams (SSE) open at once per web process; each holds a Gunicorn thread,
+    # so keep this below --threads. Pages beyond the limit poll instead.
+    SSE_MAX_STREAMS=int(os.environ.get("SSE_MAX_STREAMS", 4)),
+    # Largest per_page accepted by the JSON products API
+    API_MAX_PER_PAGE=int(os.environ.get("API_MAX_PER_PAGE", 1000))
 )
 
 # --- EXTENSIONS ---
 db.init_app(app)
 celery = make_celery(app)
+# Free slots for progress streams in this process
+sse_slots = threading.BoundedSemaphore(app.config["SSE_MAX_STREAMS"])
 
 # --- REPOSITORIES ---
 product_repo = ProductRepository()
 webhook_repo = WebhookRepository() # Instantiate WebhookRepository
+imported_file_repo = ImportedFileRepository()
+outbox_repo = OutboxRepository()
+
+# --- REQUEST METRICS ---
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    # Streamed responses (export, SSE) are timed until their first byte
+    if 'request_started' in g:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(get_redis(), request.method, route, response.status_code,
+                       time.perf_counter() - g.request_started)
+    return response
 
 # --- ROUTES ---
 @app.route("/")
@@ -39,41 +116,98 @@ def upload_csv():
     if not file:
         return jsonify({"error": "No file provided"}), 400
 
-    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-    filename = f"{uuid.uuid4()}.csv"
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    file.save(filepath)
-
-    task = tasks.import_products_task.delay(filepath) # Assign the result to 'task'
+    spool = file.stream
+    if isinstance(spool, UploadSpool):
+        # Already written to UPLOAD_FOLDER (and hashed/counted) while the body was parsed
+        spool.close()
+        filepath = spool.filepath
+        upload_info = spool.info()
+        if upload_info['columns'] is not None and 'sku' not in upload_info['columns']:
+            os.remove(filepath)
+            return jsonify({"error": "CSV must contain a 'sku' column."}), 400
+
+        # Suppliers re-send identical files; skip those without queuing an import while
+        # the catalog is unchanged since, unless "Import anyway" was ticked
+        upload_info['force'] = parse_flag(request.form.get('force'))
+        previous_import = None
+        if not upload_info['force']:
+            previous_import = imported_file_repo.get_applied(upload_info['sha256'], product_repo.listing_version())
+        if previous_import is not None:
+            os.remove(filepath)
+            return jsonify({
+                "already_imported": True,
+                "status": f"This file was already imported on {previous_import.imported_at:%Y-%m-%d %H:%M} UTC "
+                          f"({previous_import.rows_processed} rows) and the catalog is unchanged since. "
+                          f"Nothing to do; tick \"Import anyway\" to import it again."
+            })
+    else:
+        os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+        filename = f"{uuid.uuid4()}.csv"
+        filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+        file.save(filepath)
+        upload_info = None
+
+    # Only resumable imports are acknowledged late (redelivered after a worker crash)
+    task_name = task_names.IMPORT_PRODUCTS_RESUMABLE if app.config["IMPORT_RESUMABLE"] else task_names.IMPORT_PRODUCTS
+    task = celery.send_task(task_name, args=(filepath,), kwargs={'upload_info': upload_info})
     session['upload_task_id'] = task.id
     return jsonify({"task_id": task.id})
 
-@app.route("/status/<task_id>")
-def task_status(task_id):
+def get_task_status(task_id):
+    """Builds the progress payload reported to the UI for a Celery task."""
     task = celery.AsyncResult(task_id)
-    # Handle cases where task.info might be None
-    if task.info is None:
+    # Handle cases where task.info might be None (or an exception on failure)
+    if not isinstance(task.info, dict):
         response_data = {'state': task.state, 'status': 'Pending... (no info yet)'}
     else:
         response_data = {'state': task.state, 'status': task.info.get('status', 'Pending...')}
         if 'progress' in task.info:
             response_data['progress'] = task.info['progress']
+        if 'resumed_from' in task.info:
+            response_data['resumed_from'] = task.info['resumed_from']
+    return task, response_data
+
+@app.route("/status/<task_id>")
+def task_status(task_id):
+    _, response_data = get_task_status(task_id)
     return jsonify(response_data)
 
+@app.route("/status/<task_id>/events")
+def task_status_events(task_id):
+    """
+    Server-Sent Events stream of a task's progress, pushed from Redis pub/sub
+    as the task publishes it. /status/<task_id> remains for polling clients.
+    """
+    # A stream holds a Gunicorn thread until it ends; past SSE_MAX_STREAMS the
+    # EventSource fails on the 503 and the page falls back to polling
+    if not sse_slots.acquire(blocking=False):
+        return Response("Too many open progress streams, poll /status/<task_id> instead.",
+                        status=503, mimetype="text/plain", headers={"Retry-After": "5"})
+    try:
+        events = iter_progress_events(get_redis(), task_id, lambda: get_task_status(task_id)[1])
+        response = Response(stream_with_context(events), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    except Exception:
+        sse_slots.release()
+        raise
+    # Released when the server closes the response (stream ended or client gone)
+    response.call_on_close(sse_slots.release)
+    return response
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus metrics of imports, webhook deliveries and requests, aggregated over all processes."""
+    return Response(render_metrics(get_redis()), mimetype="text/plain; version=0.0.4")
+
 @app.route("/check-upload-status")
 def check_upload_status():
     task_id = session.get('upload_task_id')
     if not task_id:
         return jsonify({"status": "no_active_upload"})
 
-    task = celery.AsyncResult(task_id)
-    # Handle cases where task.info might be None
-    if task.info is None:
-        response_data = {'state': task.state, 'status': 'Pending... (no info yet)'}
-    else:
-        response_data = {'state': task.state, 'status': task.info.get('status', 'Pending...')}
-        if 'progress' in task.info:
-            response_data['progress'] = task.info['progress']
+    task, response_data = get_task_status(task_id)
+    # The page reopens the progress stream of this task after a reload
+    response_data['task_id'] = task_id
 
     if task.state in ['SUCCESS', 'FAILURE', 'REVOKED']:
         session.pop('upload_task_id', None)
@@ -86,25 +220,61 @@ def clear_upload_session():
     return jsonify({'success': True})
 
 # --- Product Routes ---
+def parse_flag(value):
+    """Boolean query/form flag: '1', 'true', 'yes' and 'on' (checkboxes) are true, anything else false."""
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+def get_product_filters(args):
+    """Filter dict of the products listing, read from query string or form fields."""
+    return {
+        'sort_by': args.get('sort_by', 'name', type=str),
+        'sort_order': args.get('sort_order', 'asc', type=str),
+        'search_field': args.get('search_field', 'name', type=str),
+        'search_value': args.get('search_value', '', type=str),
+        'exact_match': parse_flag(args.get('exact_match')) or None,
+        'active_filter': args.get('active_filter', 'all', type=str)
+    }
+
 @app.route("/products")
 def list_products():
     page = request.args.get('page', 1, type=int)
-    filters = {
-        'sort_by': request.args.get('sort_by', 'name', type=str),
-        'sort_order': request.args.get('sort_order', 'asc', type=str),
-        'search_field': request.args.get('search_field', 'name', type=str),
-        'search_value': request.args.get('search_value', '', type=str),
-        'exact_match': request.args.get('exact_match', type=bool),
-        'active_filter': request.args.get('active_filter', 'all', type=str)
-    }
+    filters = get_product_filters(request.args)
     
-    products = product_repo.list_paginated(page=page, per_page=100, filters=filters)
+    # 'keyset' seeks by cursor instead of OFFSET and shows an approximate total
+    pagination = request.args.get('pagination', app.config["PRODUCTS_PAGINATION"], type=str)
+    if pagination == 'keyset':
+        products = product_repo.list_keyset(per_page=100, filters=filters,
+                                            cursor=request.args.get('cursor', type=str),
+                                            exact_count=parse_flag(request.args.get('exact_count')))
+    elif filters['search_field'] == 'fulltext' and filters['search_value']:
+        # Full-text results are ordered by relevance
+        products = product_repo.search_ranked(page=page, per_page=100, filters=filters)
+    else:
+        products = product_repo.list_paginated(page=page, per_page=100, filters=filters)
     
     return render_template("products.html", 
                            products=products, 
                            active_page="products",
+                           pagination=pagination,
                            **filters)
 
+@app.route("/products/export")
+def export_products():
+    """
+    Streams the products matching the listing filters as CSV (gzip with
+    ?compress=gzip), without loading the catalog into memory.
+    """
+    filters = get_product_filters(request.args)
+    compress = request.args.get('compress', type=str) == 'gzip'
+    rows = product_repo.iter_export_rows(filters)
+
+    filename = "products.csv.gz" if compress else "products.csv"
+    return Response(
+        stream_with_context(iter_csv_export(rows, compress=compress)),
+        mimetype="application/gzip" if compress else "text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.route("/products/add", methods=["GET", "POST"])
 def add_product():
     if request.method == "POST":
@@ -113,10 +283,9 @@ def add_product():
         description = request.form["description"]
         active = "active" in request.form
         try:
-            product = product_repo.create(sku=sku, name=name, description=description, active=active)
-            flash(f"Product '{product.name}' added successfully!", "success")
+            product = product_repo.create(sku=sku, name=name, description=description, active=active, commit=False)
             
-            # Dispatch webhook for product_created event (new event type)
+            # Webhook for product_created event, committed with the product (transactional outbox)
             payload = {
                 "event": "product_created",
                 "product_id": product.id,
@@ -128,10 +297,13 @@ def add_product():
                     "active": product.active
                 }
             }
-            tasks.send_webhook_event_task.delay('product_created', payload)
+            outbox_repo.add('product_created', payload)
+            product_repo.commit()
+            flash(f"Product '{product.name}' added successfully!", "success")
             
             return redirect(url_for("list_products"))
         except Exception as e:
+            db.session.rollback()
             flash(f"Error adding product: {e}", "error")
     return render_template("add_edit_product.html", active_page="products", title="Add Product")
 
@@ -155,10 +327,9 @@ def edit_product(product_id):
                 "active": product.active
             }
 
-            product_repo.update(product, update_data)
-            flash("Product updated successfully!", "success")
+            product_repo.update(product, update_data, commit=False)
 
-            # Dispatch webhook for product_updated event
+            # Webhook for product_updated event, committed with the change
             payload = {
                 "event": "product_updated",
                 "product_id": product.id,
@@ -173,11 +344,14 @@ def edit_product(product_id):
                     }
                 }
             }
-            tasks.send_webhook_event_task.delay('product_updated', payload) # Use tasks.send_webhook_event_task
+            outbox_repo.add('product_updated', payload) # Relayed per event or batched
+            product_repo.commit()
+            flash("Product updated successfully!", "success")
 
             redirect_args = {k: v for k, v in request.form.items() if k not in ['name', 'description', 'active', 'sku', 'csrf_token']}
             return redirect(url_for("list_products", **redirect_args))
         except Exception as e:
+            db.session.rollback()
             flash(f"Error updating product: {e}", "error")
     return render_template("add_edit_product.html", active_page="products", title="Edit Product", product=product)
 
@@ -194,7 +368,7 @@ def toggle_active(product_id):
             "active": product.active
         }
 
-        product_repo.toggle_active(product) # This updates the product.active state
+        product_repo.toggle_active(product, commit=False) # This updates the product.active state
 
         # Capture new data after toggle
         new_product_data = {
@@ -205,7 +379,7 @@ def toggle_active(product_id):
             "active": product.active
         }
         
-        # Dispatch webhook for product_updated event with consistent structure
+        # Webhook for product_updated event with consistent structure, committed with the toggle
         payload = {
             "event": "product_updated",
             "product_id": product.id,
@@ -214,33 +388,66 @@ def toggle_active(product_id):
                 "new_data": new_product_data
             }
         }
-        tasks.send_webhook_event_task.delay('product_updated', payload)
+        outbox_repo.add('product_updated', payload)
+        product_repo.commit()
 
         return jsonify({'success': True, 'new_status': product.active})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route("/products/delete-all", methods=["POST"])
 def delete_all_products():
     try:
-        # Optionally, count products before deletion if you want that in payload
-        # product_count = product_repo.get_count()
-
-        product_repo.delete_all()
-        flash("All products have been successfully deleted.", "success")
-        
-        # Dispatch webhook for bulk_products_deleted event
-        payload = {
-            "event": "bulk_products_deleted",
-            "message": "All products in the database have been deleted.",
-            # "deleted_count": product_count # if captured above
-        }
-        tasks.send_webhook_event_task.delay('bulk_products_deleted', payload)
-
+        # Deleted in batches by a worker; the products page polls /status/<task_id>
+        task = celery.send_task(task_names.DELETE_ALL_PRODUCTS)
+        flash("Deleting all products in the background.", "success")
+        return redirect(url_for('list_products', delete_task_id=task.id))
     except Exception as e:
         flash(f"An error occurred while deleting products: {e}", "error")
     return redirect(url_for('list_products'))
 
+@app.route("/products/bulk/<action>", methods=["POST"])
+def bulk_products(action):
+    """
+    Activates, deactivates or deletes all products matching the listing filters
+    (JSON body {"filters": {...}} or the search form fields). Large matches are
+    handed to a Celery task; the response then carries its task_id.
+    """
+    if action not in BULK_ACTIONS:
+        return jsonify({"error": f"Unknown bulk action '{action}'."}), 400
+
+    if request.is_json:
+        body = request.get_json(silent=True) or {}
+        filters = get_product_filters(MultiDict(body.get('filters') or {}))
+    else:
+        filters = get_product_filters(request.form)
+    # Sorting does not affect which products match
+    filters.pop('sort_by', None)
+    filters.pop('sort_order', None)
+
+    try:
+        matching, _ = product_repo.count(filters, exact=True)
+        if matching > app.config["BULK_ASYNC_THRESHOLD"]:
+            task = celery.send_task(task_names.BULK_PRODUCTS, args=(action, filters))
+            result = {"queued": True, "task_id": task.id, "matching": matching}
+            message = f"Bulk {action} of {matching} products started in the background."
+        else:
+            affected = apply_bulk_action(action, filters)
+            result = {"queued": False, "affected": affected}
+            message = f"Bulk {action} complete: {affected} products affected."
+    except Exception as e:
+        if request.is_json:
+            return jsonify({"error": str(e)}), 500
+        flash(f"Error running bulk {action}: {e}", "error")
+        return redirect(url_for('list_products'))
+
+    if request.is_json:
+        return jsonify(result)
+    flash(message, "success")
+    redirect_args = {k: v for k, v in request.form.items() if k != 'csrf_token'}
+    return redirect(url_for('list_products', **redirect_args))
+
 @app.route("/products/<int:product_id>/delete", methods=["POST"])
 def delete_product(product_id):
     product = product_repo.get_by_id(product_id)
@@ -254,21 +461,113 @@ def delete_product(product_id):
             "active": product.active
         }
 
-        product_repo.delete(product)
-        flash("Product deleted successfully!", "success")
+        product_repo.delete(product, commit=False)
 
-        # Dispatch webhook for product_deleted event
+        # Webhook for product_deleted event, committed with the deletion
         payload = {
             "event": "product_deleted",
             "product_id": deleted_product_data["id"],
             "deleted_data": deleted_product_data
         }
-        tasks.send_webhook_event_task.delay('product_deleted', payload)
+        outbox_repo.add('product_deleted', payload)
+        product_repo.commit()
+        flash("Product deleted successfully!", "success")
 
     except Exception as e:
+        db.session.rollback()
         flash(f"Error deleting product: {e}", "error")
     return redirect(url_for("list_products"))
 
+# --- JSON API ---
+def get_api_fields(args):
+    """Fields requested with ?fields=sku,active (all API_FIELDS by default); None if one is unknown."""
+    requested = [field.strip() for field in args.get('fields', '', type=str).split(',') if field.strip()]
+    if not requested:
+        return list(API_FIELDS)
+    if any(field not in API_FIELDS for field in requested):
+        return None
+    return list(dict.fromkeys(requested))
+
+def api_etag(*parts):
+    """
+    ETag of an API response, derived from the listing cache generation (bumped
+    by every product write) and the request, so a revalidation costs no query.
+    None while Redis is unavailable; the response body is hashed instead.
+    """
+    version = product_repo.listing_version()
+    if version is None:
+        return None
+    return hashlib.sha1(json.dumps([version, *parts], sort_keys=True, default=str).encode()).hexdigest()
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+def conditional(response, etag):
+    """Tags 'response' with 'etag' (or a hash of its body) and answers 304 if the client's copy matches."""
+    if etag:
+        response.set_etag(etag)
+    elif not response.is_streamed:
+        response.add_etag()
+    # Clients may keep the response but must revalidate it
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route("/api/products")
+def api_list_products():
+    """
+    Products matching the listing filters as JSON pages (?page, ?per_page), with
+    only the columns named in ?fields. ?format=ndjson (or Accept:
+    application/x-ndjson) streams every match as one JSON object per line instead.
+    """
+    fields = get_api_fields(request.args)
+    if fields is None:
+        return jsonify({"error": f"Unknown field. Available fields: {', '.join(API_FIELDS)}."}), 400
+    filters = get_product_filters(request.args)
+    ndjson = (request.args.get('format', type=str) == 'ndjson'
+              or request.accept_mimetypes.best == 'application/x-ndjson')
+
+    if ndjson:
+        etag = api_etag('products.ndjson', fields, filters)
+        if etag and etag in request.if_none_match:
+            return not_modified(etag)
+        rows = product_repo.iter_fields(filters, fields)
+        response = Response(stream_with_context(iter_ndjson_export(rows, fields)), mimetype="application/x-ndjson")
+        return conditional(response, etag)
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 100, type=int), 1), app.config["API_MAX_PER_PAGE"])
+    etag = api_etag('products', fields, filters, page, per_page)
+    if etag and etag in request.if_none_match:
+        return not_modified(etag)
+
+    data = product_repo.list_fields(page, per_page, filters, fields)
+    pages = -(-data['total'] // per_page)
+    return conditional(jsonify({
+        "items": data['items'],
+        "page": page,
+        "per_page": per_page,
+        "total": data['total'],
+        "pages": pages,
+        "next_page": page + 1 if page < pages else None,
+    }), etag)
+
+@app.route("/api/products/<int:product_id>")
+def api_get_product(product_id):
+    """One product as JSON, with only the columns named in ?fields."""
+    fields = get_api_fields(request.args)
+    if fields is None:
+        return jsonify({"error": f"Unknown field. Available fields: {', '.join(API_FIELDS)}."}), 400
+    etag = api_etag('product', product_id, fields)
+    if etag and etag in request.if_none_match:
+        return not_modified(etag)
+
+    product = product_repo.get_fields(product_id, fields)
+    if product is None:
+        return jsonify({"error": "Product not found."}), 404
+    return conditional(jsonify(product), etag)
+
 # --- Webhook Routes ---
 @app.route("/webhooks")
 def list_webhooks():
@@ -281,13 +580,15 @@ def list_webhooks():
     webhooks = webhook_repo.list_paginated(page=page, per_page=10, filters=filters) # 10 webhooks per page
     
     # Define possible event types for the filter dropdown
-    event_types = sorted(list(set([wh.event_type for wh in webhook_repo.get_all_enabled()]))) # Get all unique event types
+    event_types = webhook_repo.get_event_types() # Distinct event types, cached
     if not event_types: # Fallback if no webhooks exist yet
         event_types = ['product_updated', 'csv_import_complete', 'product_deleted', 'bulk_products_deleted']
 
     return render_template("webhooks.html", 
                            webhooks=webhooks, 
                            event_types=event_types,
+                           now=datetime.utcnow(), # For the circuit breaker state
+                           breaker_threshold=app.config["WEBHOOK_BREAKER_THRESHOLD"],
                            active_page="webhooks",
                            **filters)
 
@@ -303,7 +604,7 @@ def add_webhook():
             return redirect(url_for("list_webhooks"))
         except Exception as e:
             flash(f"Error adding webhook: {e}", "error")
-    possible_event_types = ['product_updated', 'csv_import_complete', 'product_deleted', 'bulk_products_deleted']
+    possible_event_types = ['product_updated', 'csv_import_complete', 'product_deleted', 'bulk_products_deleted', 'bulk_products_updated']
     return render_template("add_edit_webhook.html", 
                            active_page="webhooks", 
                            title="Add Webhook", 
@@ -324,7 +625,7 @@ def edit_webhook(webhook_id):
             return redirect(url_for("list_webhooks"))
         except Exception as e:
             flash(f"Error updating webhook: {e}", "error")
-    possible_event_types = ['product_updated', 'csv_import_complete', 'product_deleted', 'bulk_products_deleted']
+    possible_event_types = ['product_updated', 'csv_import_complete', 'product_deleted', 'bulk_products_deleted', 'bulk_products_updated']
     return render_template("add_edit_webhook.html", 
                            active_page="webhooks", 
                            title="Edit Webhook", 
@@ -354,7 +655,7 @@ def toggle_webhook_enabled(webhook_id):
 def test_webhook(webhook_id):
     try:
         # Queue the test webhook task
-        tasks.test_webhook_task.delay(webhook_id) # Use tasks.test_webhook_task
+        celery.send_task(task_names.TEST_WEBHOOK, args=(webhook_id,))
         return jsonify({'success': True, 'message': 'Webhook test initiated successfully.'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -366,5 +667,29 @@ def init_db():
     db.create_all()
     print("Initialized the database.")
 
+@app.cli.command("export-products")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), help="Output file (default: stdout).")
+@click.option("--gzip", "compress", is_flag=True, help="Write gzip-compressed CSV.")
+@click.option("--active-filter", type=click.Choice(["all", "active", "inactive"]), default="all")
+@click.option("--search-field", type=click.Choice(["sku", "name", "description", "fulltext"]), default="name")
+@click.option("--search-value", default="")
+@click.option("--exact-match", is_flag=True)
+def export_products_command(output, compress, active_filter, search_field, search_value, exact_match):
+    """Export products as CSV, with the same filters as the products listing."""
+    filters = {
+        'search_field': search_field,
+        'search_value': search_value,
+        'exact_match': exact_match,
+        'active_filter': active_filter
+    }
+    rows = product_repo.iter_export_rows(filters)
+    target = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        for piece in iter_csv_export(rows, compress=compress):
+            target.write(piece)
+    finally:
+        if output:
+            target.close()
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
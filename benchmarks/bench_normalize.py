@@ -0,0 +1,54 @@
+"""
+Micro-benchmark for per-chunk import normalization.
+
+Compares the previous iterrows()-based row walk with the vectorized
+normalize_chunk() pipeline on synthetic chunks.
+
+Usage: python -m benchmarks.bench_normalize [chunk_size] [repeats]
+"""
+import sys
+import timeit
+
+import pandas as pd
+
+from repositories.product_repository import normalize_chunk
+
+
+def make_chunk(chunk_size):
+    """Builds a chunk with ~10% case-variant duplicate SKUs, like a real supplier file."""
+    skus = [f"sku-{i % int(chunk_size * 0.9)}" for i in range(chunk_size)]
+    skus = [sku.upper() if i % 2 else sku for i, sku in enumerate(skus)]
+    return pd.DataFrame({
+        'sku': skus,
+        'name': [f"Product {i}" for i in range(chunk_size)],
+        'description': ["Lorem ipsum dolor sit amet"] * chunk_size,
+    })
+
+
+def iterrows_baseline(chunk):
+    """The per-row loop that bulk_upsert used before vectorization."""
+    chunk = chunk.copy()
+    chunk['sku_upper'] = chunk['sku'].str.upper()
+    rows = {}
+    for _, row in chunk.iterrows():
+        rows[row['sku_upper']] = (row['sku'], row.get('name', ''), row.get('description', ''))
+    return list(rows.values())
+
+
+def vectorized(chunk):
+    normalized = normalize_chunk(chunk)
+    return list(normalized[['sku', 'name', 'description']].itertuples(index=False, name=None))
+
+
+def main():
+    chunk_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    chunk = make_chunk(chunk_size)
+
+    for label, func in (('iterrows', iterrows_baseline), ('vectorized', vectorized)):
+        seconds = min(timeit.repeat(lambda: func(chunk), number=1, repeat=repeats))
+        print(f"{label:>10}: {seconds * 1000:8.2f} ms/chunk ({chunk_size} rows)")
+
+
+if __name__ == "__main__":
+    main()
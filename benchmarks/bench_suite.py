@@ -0,0 +1,221 @@
+"""
+Benchmark suite for the import, listing and webhook delivery paths.
+
+Runs against the database and Redis configured for the app (DATABASE_URL,
+REDIS_URL); use a dedicated benchmark database, since --reset deletes all
+products first. Celery runs eagerly, so imports execute in this process.
+Results are written as JSON so runs can be compared.
+
+Usage: python -m benchmarks.bench_suite [--rows 10k] [--existing 100000] [--overlap 0.2]
+           [--duplicates 0.05] [--case-variants 0.1] [--listing-repeats 20]
+           [--webhooks 50] [--webhook-hosts 1] [--webhook-delay 0.05]
+           [--skip import,listing,webhooks] [--reset] [--output bench.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.generate_csv import SIZES, write_csv, write_base_catalog
+
+# Typical /products requests of staff and the storefront sync
+LISTING_CASES = {
+    'default': {},
+    'active_only': {'active_filter': 'active'},
+    'search_name': {'search_field': 'name', 'search_value': 'oak'},
+    'search_sku_exact': {'search_field': 'sku', 'search_value': 'BASE-00000042', 'exact_match': 'True'},
+    'fulltext': {'search_field': 'fulltext', 'search_value': 'wireless oak'},
+    'sort_description_desc': {'sort_by': 'description', 'sort_order': 'desc'},
+    'deep_page': {'page': 50},
+    'keyset': {'pagination': 'keyset'},
+}
+
+
+def summarize(samples):
+    """Mean/p50/p95/max in milliseconds of a list of durations in seconds."""
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000
+
+    return {
+        'runs': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': round(percentile(0.5), 3),
+        'p95_ms': round(percentile(0.95), 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_import(tasks, filepath):
+    """Imports a file synchronously and returns the wall time with the task result."""
+    start = time.perf_counter()
+    result = tasks.import_products_task.apply(args=(filepath,), kwargs={'resumable': False}).get()
+    seconds = time.perf_counter() - start
+    return seconds, result
+
+
+def bench_import(app, tasks, args, workdir):
+    """Imports a base catalog (if --existing), then the generated file, timing both."""
+    results = {}
+    if args.existing:
+        base = write_base_catalog(os.path.join(workdir, 'base.csv'), args.existing)
+        seconds, result = run_import(tasks, base)
+        results['base_catalog'] = {'rows': args.existing, 'seconds': round(seconds, 3),
+                                   'rows_per_second': round(args.existing / seconds), 'result': result}
+
+    rows = SIZES.get(args.rows.lower()) or int(args.rows)
+    filepath = write_csv(os.path.join(workdir, 'products.csv'), rows, duplicates=args.duplicates,
+                         case_variants=args.case_variants, overlap=args.overlap,
+                         existing=args.existing, seed=args.seed)
+    seconds, result = run_import(tasks, filepath)
+    results['import'] = {'rows': rows, 'bytes': os.path.getsize(filepath), 'seconds': round(seconds, 3),
+                         'rows_per_second': round(rows / seconds), 'result': result}
+
+    # Re-importing the same content exercises the unchanged-row path
+    seconds, result = run_import(tasks, filepath)
+    results['reimport_unchanged'] = {'rows': rows, 'seconds': round(seconds, 3),
+                                     'rows_per_second': round(rows / seconds), 'result': result}
+    return results
+
+
+def bench_listing(app, args):
+    """Times /products for typical filters, with a cold and a warm listing cache."""
+    from repositories.product_repository import listing_cache
+
+    client = app.test_client()
+    results = {}
+    for name, params in LISTING_CASES.items():
+        cold, warm, statuses = [], [], set()
+        for _ in range(args.listing_repeats):
+            with app.app_context():
+                listing_cache.invalidate()
+            for samples in (cold, warm):
+                start = time.perf_counter()
+                response = client.get('/products', query_string=params)
+                samples.append(time.perf_counter() - start)
+                statuses.add(response.status_code)
+        results[name] = {'params': params, 'statuses': sorted(statuses),
+                         'cold': summarize(cold), 'warm': summarize(warm)}
+    return results
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Webhook receiver answering 200 after a configurable delay."""
+    delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_webhooks(app, args):
+    """Fans one event out to --webhooks subscribers on a local stub server."""
+    from webhook_dispatcher import get_dispatcher
+
+    StubHandler.delay = args.webhook_delay
+    # 127.0.0.x addresses are all loopback on Linux; several "hosts" need the wildcard bind
+    server = ThreadingHTTPServer(('0.0.0.0' if args.webhook_hosts > 1 else '127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    targets = [(index, f"http://127.0.0.{1 + index % args.webhook_hosts}:{port}/hook/{index}")
+               for index in range(args.webhooks)]
+    payload = {'event': 'product_updated', 'product_id': 1, 'changes': {}}
+
+    try:
+        with app.app_context():
+            dispatcher = get_dispatcher(app.config)
+            samples, failures = [], 0
+            for _ in range(5):
+                start = time.perf_counter()
+                deliveries = dispatcher.dispatch(targets, payload)
+                samples.append(time.perf_counter() - start)
+                failures += sum(1 for delivery in deliveries if delivery['status_code'] != 200)
+    finally:
+        server.shutdown()
+
+    return {
+        'subscribers': args.webhooks,
+        'hosts': args.webhook_hosts,
+        'stub_delay_ms': args.webhook_delay * 1000,
+        'max_workers': app.config.get('WEBHOOK_MAX_WORKERS'),
+        'per_host_limit': app.config.get('WEBHOOK_PER_HOST_LIMIT'),
+        'failures': failures,
+        'fan_out': summarize(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--rows', default='10k', help="Rows of the imported file or a preset: " + ", ".join(SIZES))
+    parser.add_argument('--existing', type=int, default=0, help="Base catalog size imported first")
+    parser.add_argument('--overlap', type=float, default=0.0)
+    parser.add_argument('--duplicates', type=float, default=0.05)
+    parser.add_argument('--case-variants', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--listing-repeats', type=int, default=20)
+    parser.add_argument('--webhooks', type=int, default=50)
+    parser.add_argument('--webhook-hosts', type=int, default=1)
+    parser.add_argument('--webhook-delay', type=float, default=0.05, help="Stub server response delay (s)")
+    parser.add_argument('--skip', default='', help="Comma-separated benchmarks to skip")
+    parser.add_argument('--reset', action='store_true', help="Delete all products before importing")
+    parser.add_argument('--output', default=f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    args = parser.parse_args()
+    skip = set(filter(None, args.skip.split(',')))
+
+    from app import app, celery
+    import tasks
+    from extensions import db
+    from repositories.product_repository import ProductRepository
+
+    # Imports (and the webhooks they fire) run synchronously in this process
+    celery.conf.update(task_always_eager=True, task_eager_propagates=True)
+    app.config.update(IMPORT_SHARDS=1, WEBHOOK_BATCH_WINDOW=0)
+
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'options': vars(args),
+        'results': {},
+    }
+    with app.app_context():
+        report['database'] = db.engine.dialect.name
+        if args.reset:
+            ProductRepository().delete_all()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if 'import' not in skip:
+            report['results'].update(bench_import(app, tasks, args, workdir))
+    if 'listing' not in skip:
+        report['results']['listing'] = bench_listing(app, args)
+    if 'webhooks' not in skip:
+        report['results']['webhooks'] = bench_webhooks(app, args)
+
+    with open(args.output, 'w') as handle:
+        json.dump(report, handle, indent=2, default=str)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
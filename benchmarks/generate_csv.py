@@ -0,0 +1,98 @@
+"""
+Synthetic product CSV generator for import benchmarks.
+
+Produces files shaped like supplier uploads: a share of rows repeating an
+earlier SKU of the same file, a share of SKUs in a different letter case
+(which the importer treats as the same product) and a share of SKUs that
+already exist in the catalog, i.e. that were written by a previous file
+generated with the same 'existing' count.
+
+Usage: python -m benchmarks.generate_csv OUTPUT --rows 1000000
+           [--duplicates 0.05] [--case-variants 0.1] [--overlap 0.2] [--existing N] [--seed 42]
+OUTPUT ending in .gz is gzip-compressed.
+"""
+import argparse
+import csv
+import gzip
+import random
+
+# Size presets used by the benchmark suite
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+WORDS = ("steel", "oak", "compact", "wireless", "classic", "deluxe", "outdoor", "modular",
+         "premium", "portable", "ceramic", "solar", "ergonomic", "vintage", "smart", "heavy-duty")
+
+
+def existing_sku(index):
+    """SKU of the index-th product of a base catalog; overlap rows reuse these."""
+    return f"BASE-{index:08d}"
+
+
+def generate_rows(rows, duplicates=0.05, case_variants=0.1, overlap=0.0, existing=0, seed=42):
+    """
+    Yields (sku, name, description) rows. 'duplicates', 'case_variants' and
+    'overlap' are the fractions of rows repeating an earlier SKU of this file,
+    written in another letter case, and hitting one of 'existing' catalog SKUs.
+    """
+    rng = random.Random(seed)
+    emitted = []
+    for index in range(rows):
+        roll = rng.random()
+        if emitted and roll < duplicates:
+            sku = rng.choice(emitted)
+        elif existing and roll < duplicates + overlap:
+            sku = existing_sku(rng.randrange(existing))
+        else:
+            sku = f"sku-{seed}-{index:09d}"
+            # Bounded sample of earlier SKUs to draw duplicates from
+            if len(emitted) < 100_000:
+                emitted.append(sku)
+            else:
+                emitted[rng.randrange(len(emitted))] = sku
+        if rng.random() < case_variants:
+            sku = sku.swapcase()
+
+        name = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+        yield sku, name, description
+
+
+def write_csv(path, rows, **options):
+    """Writes a generated file (gzip if 'path' ends in .gz). Returns 'path'."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['sku', 'name', 'description'])
+        writer.writerows(generate_rows(rows, **options))
+    return path
+
+
+def write_base_catalog(path, existing):
+    """A file of exactly the 'existing' base SKUs, imported before overlap runs."""
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['sku', 'name', 'description'])
+        writer.writerows((existing_sku(index), f"Base product {index}", "Seeded by the benchmark suite")
+                         for index in range(existing))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('output')
+    parser.add_argument('--rows', default='10k', help="Row count or a preset: " + ", ".join(SIZES))
+    parser.add_argument('--duplicates', type=float, default=0.05)
+    parser.add_argument('--case-variants', type=float, default=0.1)
+    parser.add_argument('--overlap', type=float, default=0.0)
+    parser.add_argument('--existing', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rows = SIZES.get(args.rows.lower()) or int(args.rows)
+    write_csv(args.output, rows, duplicates=args.duplicates, case_variants=args.case_variants,
+              overlap=args.overlap, existing=args.existing, seed=args.seed)
+    print(f"Wrote {rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
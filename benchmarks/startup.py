@@ -0,0 +1,85 @@
+"""
+Startup time and memory of the web and worker processes.
+
+Each scenario imports its modules in a fresh interpreter, like a new
+gunicorn or Celery worker process does, and reports the import time, the
+peak RSS and which heavy dependencies ended up loaded. "web" is what a
+gunicorn worker imports (app.py); "worker" adds tasks.py, which is also
+what every web worker loaded while app.py imported tasks at module level.
+No database or Redis connection is needed.
+
+Usage: python -m benchmarks.startup [--repeats 5] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCENARIOS = {
+    'web': ['app'],
+    'worker': ['app', 'tasks'],
+}
+
+# Modules only the worker should need
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'requests')
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'import_seconds': seconds,
+    'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'heavy_modules': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(modules):
+    """Imports 'modules' in a new interpreter; returns its measurements and total wall time."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    output = subprocess.check_output(
+        [sys.executable, '-c', CHILD.format(modules=modules, heavy=HEAVY_MODULES)], cwd=root, text=True)
+    sample = json.loads(output.splitlines()[-1])
+    sample['process_seconds'] = time.perf_counter() - start
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    report = {}
+    for name, modules in SCENARIOS.items():
+        samples = [measure(modules) for _ in range(args.repeats)]
+        report[name] = {
+            'modules': modules,
+            'import_ms': round(statistics.median(s['import_seconds'] for s in samples) * 1000, 1),
+            'process_ms': round(statistics.median(s['process_seconds'] for s in samples) * 1000, 1),
+            'max_rss_mib': round(statistics.median(s['max_rss_kib'] for s in samples) / 1024, 1),
+            'heavy_modules': samples[-1]['heavy_modules'],
+        }
+
+    for name, result in report.items():
+        print(f"{name:8} import {result['import_ms']:8.1f} ms  process {result['process_ms']:8.1f} ms  "
+              f"RSS {result['max_rss_mib']:7.1f} MiB  heavy: {', '.join(result['heavy_modules']) or '-'}")
+    web, worker = report['web'], report['worker']
+    print(f"web saves {worker['import_ms'] - web['import_ms']:.1f} ms and "
+          f"{worker['max_rss_mib'] - web['max_rss_mib']:.1f} MiB per process")
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
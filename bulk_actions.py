@@ -0,0 +1,36 @@
+from repositories.product_repository import ProductRepository
+from repositories.outbox_repository import OutboxRepository
+from repositories.imported_file_repository import ImportedFileRepository
+
+# Bulk product actions by filter, and the webhook event each one fires
+BULK_ACTIONS = {
+    'activate': 'bulk_products_updated',
+    'deactivate': 'bulk_products_updated',
+    'delete': 'bulk_products_deleted',
+}
+
+def apply_bulk_action(action, filters):
+    """
+    Applies a bulk action to all products matching 'filters' (the filter dict
+    of the products listing) as one set-based statement, then fires a single
+    aggregated webhook event, committed with the change through the outbox.
+    Returns the number of affected products.
+    """
+    product_repo = ProductRepository()
+    if action == 'delete':
+        affected = product_repo.bulk_delete(filters, commit=False)
+        # Deleted products must come back when a previously imported file is uploaded again
+        ImportedFileRepository().clear(commit=False)
+    else:
+        affected = product_repo.bulk_set_active(filters, action == 'activate', commit=False)
+
+    event_type = BULK_ACTIONS[action]
+    payload = {
+        "event": event_type,
+        "action": action,
+        "filters": filters,
+        "affected_count": affected
+    }
+    OutboxRepository().add(event_type, payload)
+    product_repo.commit()
+    return affected
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import redis
+from extensions import get_redis
+
+# Redis key holding the shared version counter of a VersionedCache namespace
+VERSION_KEY = "cache:{namespace}:version"
+
+# Redis hash holding the generation of a ResultCache namespace. 'epoch' is a random
+# id set whenever the hash is (re)created, so a counter that restarts after a Redis
+# restart, flush or eviction never repeats a generation handed out before
+GENERATION_KEY = "cache:{namespace}:generation"
+
+
+class VersionedCache:
+    """
+    In-process cache with TTL-based eviction, invalidated across all web and
+    worker processes through a version counter in Redis: invalidate() bumps
+    the counter and every process drops its entries when it sees a new version.
+    If Redis is unavailable, entries still expire after the TTL.
+    """
+
+    def __init__(self, namespace, ttl=60):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._entries = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _current_version(self):
+        try:
+            return get_redis().get(VERSION_KEY.format(namespace=self.namespace))
+        except redis.RedisError:
+            return self._version
+
+    def get(self, key, loader):
+        """Returns the cached value for 'key', calling loader() on a miss."""
+        version = self._current_version()
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self):
+        """Drops all entries in this process and bumps the shared version for the others."""
+        with self._lock:
+            self._entries.clear()
+        try:
+            get_redis().incr(VERSION_KEY.format(namespace=self.namespace))
+        except redis.RedisError as e:
+            print(f"Cache invalidation for '{self.namespace}' not shared, Redis unavailable: {e}")
+
+
+class ResultCache:
+    """
+    Query result cache shared by all processes: values are stored in Redis as
+    JSON under a key that includes the namespace's generation (epoch + counter),
+    so invalidate() makes every cached result unreachable at once (old entries
+    expire through their TTL). While Redis is unavailable results are kept in
+    a bounded in-process LRU instead, keyed on a local generation.
+    """
+
+    def __init__(self, namespace, ttl=300, max_local_entries=256):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self._local = OrderedDict()
+        self._local_generation = 0
+        self._lock = threading.Lock()
+
+    def _entry_key(self, generation, key):
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+        return f"cache:{self.namespace}:{generation}:{digest}"
+
+    def get(self, key, loader):
+        """Returns the cached value for 'key' (JSON-serializable), calling loader() on a miss."""
+        try:
+            client = get_redis()
+            # Read the generation before loading, so a concurrent invalidate() never leaves a stale entry reachable
+            generation = self._generation(client)
+            entry_key = self._entry_key(generation, key)
+            cached = client.get(entry_key)
+            if cached is not None:
+                return json.loads(cached)
+            value = loader()
+            client.set(entry_key, json.dumps(value), ex=self.ttl)
+            return value
+        except redis.RedisError:
+            return self._get_local(key, loader)
+
+    def _get_local(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry_key = self._entry_key(self._local_generation, key)
+            entry = self._local.get(entry_key)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(entry_key)
+                return entry[1]
+
+        value = loader()
+        with self._lock:
+            self._local[entry_key] = (now + self.ttl, value)
+            self._local.move_to_end(entry_key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+        return value
+
+    def _generation(self, client):
+        key = GENERATION_KEY.format(namespace=self.namespace)
+        pipe = client.pipeline()
+        pipe.hsetnx(key, 'epoch', uuid.uuid4().hex)
+        pipe.hmget(key, 'epoch', 'count')
+        _, (epoch, count) = pipe.execute()
+        return f"{epoch.decode()}:{int(count or 0)}"
+
+    def generation(self):
+        """
+        Current shared generation as an 'epoch:counter' string, or None while Redis
+        is unavailable. Never repeats, so it can be stored and compared later.
+        """
+        try:
+            return self._generation(get_redis())
+        except redis.RedisError:
+            return None
+
+    def invalidate(self):
+        """Bumps the generation counter, shared through Redis and locally."""
+        with self._lock:
+            self._local_generation += 1
+            self._local.clear()
+        try:
+            get_redis().hincrby(GENERATION_KEY.format(namespace=self.namespace), 'count', 1)
+        except redis.RedisError as e:
+            print(f"Cache invalidation for '{self.namespace}' not shared, Redis unavailable: {e}")
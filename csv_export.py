@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+import zlib
+
+# Columns of an export; sku/name/description re-import as-is
+EXPORT_COLUMNS = ['sku', 'name', 'description', 'active']
+
+# Rows buffered before a piece of output is yielded
+ROWS_PER_PIECE = 1000
+
+
+def iter_csv_export(rows, compress=False):
+    """
+    Encodes an iterable of product rows (tuples in EXPORT_COLUMNS order) as CSV,
+    yielding bytes a few rows at a time so the output can be streamed with flat
+    memory. With 'compress', the output is a gzip stream.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None # wbits=31: gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    def flush():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % ROWS_PER_PIECE == 0:
+            piece = flush()
+            if piece:
+                yield piece
+
+    piece = flush()
+    if compressor:
+        piece += compressor.flush()
+    if piece:
+        yield piece
+
+
+def iter_ndjson_export(rows, fields):
+    """
+    Encodes an iterable of rows (tuples in 'fields' order) as newline-delimited
+    JSON, one object per row, yielding bytes a few rows at a time.
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(fields, row))))
+        if len(lines) == ROWS_PER_PIECE:
+            yield ("\n".join(lines) + "\n").encode('utf-8')
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode('utf-8')
@@ -0,0 +1,167 @@
+import gzip
+import io
+import math
+import os
+import pandas as pd
+from csv_records import RecordScanner
+
+try:
+    import pyarrow # noqa: F401 -- optional, enables pandas' multithreaded CSV parser
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# Bytes read per step when skipping forward in a stream that cannot seek
+SKIP_BLOCK_SIZE = 1024 * 1024
+
+# Row keys of shard N start at N << SHARD_ROW_BITS, so row order stays global across shards
+SHARD_ROW_BITS = 32
+
+
+def read_csv_header(filepath):
+    """
+    Reads and normalizes the CSV header once, before any chunk is parsed.
+    Raises KeyError if the required 'sku' column is missing.
+    """
+    columns = [col.lower().strip() for col in pd.read_csv(filepath, nrows=0).columns]
+    if 'sku' not in columns:
+        raise KeyError("CSV must contain a 'sku' column.")
+    return columns
+
+
+def get_progress(offset, start_offset, end_offset):
+    """Percentage of a byte range consumed, capped below 100 until the import is done."""
+    span = end_offset - start_offset
+    if span <= 0:
+        return 99
+    return min(math.ceil((offset - start_offset) / span * 100), 99)
+
+
+def is_compressed(filepath):
+    """True for .gz/.zst uploads, which are decompressed while reading."""
+    return filepath.endswith(('.gz', '.zst'))
+
+
+def open_decompressed(raw, filepath):
+    """Wraps a binary file on disk with on-the-fly decompression based on its suffix."""
+    if filepath.endswith('.gz'):
+        return gzip.GzipFile(fileobj=raw)
+    if filepath.endswith('.zst'):
+        import zstandard # Only needed for zstd uploads
+        # BufferedReader adds the line iteration the zstd stream reader lacks
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+    return raw
+
+
+def skip_to(f, offset):
+    """
+    Moves a file object to a (decompressed) byte offset. zstd streams cannot
+    seek, so they are read forward and the bytes discarded.
+    """
+    if f.seekable():
+        f.seek(offset)
+        return
+    remaining = offset
+    while remaining > 0:
+        block = f.read(min(remaining, SKIP_BLOCK_SIZE))
+        if not block:
+            break
+        remaining -= len(block)
+
+
+def iter_records(f):
+    """
+    Yields raw CSV records as bytes from a binary file object.
+    Physical lines are joined while a quoted field is still open, so multiline
+    quoted values stay in a single record (see csv_records.RecordScanner).
+    """
+    scanner = RecordScanner()
+    parts = []
+    for line in f:
+        if not parts and b'"' not in line:
+            yield line # No quoted field can start or continue on this line
+            continue
+        parts.append(line)
+        scanner.feed(line)
+        if not scanner.in_quotes and line.endswith(b'\n'):
+            yield b''.join(parts)
+            parts = []
+    if parts:
+        yield b''.join(parts)
+
+
+def iter_csv_chunks(filepath, columns, chunk_size, start_offset=None, end_offset=None, first_row=0):
+    """
+    Yields (chunk, offset, position) triples for the data rows of a CSV file.
+    'offset' is the (decompressed) byte offset right after the chunk, so a
+    caller can checkpoint it and later resume with start_offset=offset.
+    'position' is how far the file on disk has been read, for progress.
+    If 'end_offset' is given, only records starting before it are read (one shard).
+    Chunks are indexed by their row number in the file, starting at 'first_row'.
+    """
+    compressed = is_compressed(filepath)
+    with open(filepath, 'rb') as raw, open_decompressed(raw, filepath) as f:
+        records = iter_records(f)
+        if start_offset:
+            skip_to(f, start_offset)
+            offset = start_offset
+        else:
+            # Skip the header record, which was already read by read_csv_header()
+            offset = len(next(records, b''))
+
+        batch = []
+        for record in records:
+            if end_offset is not None and offset >= end_offset:
+                break
+            offset += len(record)
+            if not record.strip():
+                continue # Skip blank lines, as read_csv does
+            batch.append(record)
+            if len(batch) >= chunk_size:
+                chunk = _parse_records(batch, columns, first_row)
+                first_row += len(chunk)
+                yield chunk, offset, raw.tell() if compressed else offset
+                batch = []
+        if batch:
+            yield _parse_records(batch, columns, first_row), offset, raw.tell() if compressed else offset
+
+
+def _parse_records(records, columns, first_row):
+    """Parses a batch of raw records into a DataFrame indexed by file row number."""
+    chunk = pd.read_csv(io.BytesIO(b''.join(records)), header=None, names=columns,
+                        dtype=str, keep_default_na=False, engine=CSV_ENGINE)
+    chunk.index = range(first_row, first_row + len(chunk))
+    return chunk
+
+
+def get_data_start(filepath):
+    """Byte offset of the first data record, right after the header."""
+    with open(filepath, 'rb') as f:
+        return len(next(iter_records(f), b''))
+
+
+def compute_shards(filepath, shard_count):
+    """
+    Splits the data rows of a CSV file into up to 'shard_count' byte ranges.
+    Each boundary is moved forward to the start of the next physical line, so
+    only files with one record per line may be split (see UploadSpool.multiline).
+    Returns a list of (start_offset, end_offset) pairs.
+    """
+    size = os.path.getsize(filepath)
+    header_end = get_data_start(filepath)
+    with open(filepath, 'rb') as f:
+        boundaries = [header_end]
+        step = (size - header_end) // shard_count
+        for i in range(1, shard_count):
+            target = header_end + step * i
+            if target <= boundaries[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline() # Move to the start of the next line
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
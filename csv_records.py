@@ -0,0 +1,89 @@
+import re
+
+QUOTE = ord('"')
+NEWLINE = ord('\n')
+COMMA = ord(',')
+
+# The only bytes that can change the record state
+SPECIAL_BYTES = re.compile(rb'["\n]')
+# Newline followed by a whitespace-only line; the lookahead keeps runs of blank lines countable
+BLANK_LINE = re.compile(rb'\n[ \t\r\x0b\x0c]*(?=\n)')
+
+
+class RecordScanner:
+    """
+    Incremental scanner of CSV record boundaries over arbitrary byte blocks,
+    without pandas so the web process can use it while spooling uploads.
+
+    A quote only opens a quoted field at the start of a field, as in pandas and
+    the csv module, so a literal quote inside an unquoted value (an inch mark in
+    'TV 55" LED') does not join the following lines. Inside a quoted field
+    newlines belong to the value and "" is an escaped quote.
+    Whitespace-only records are skipped, as the import does.
+    """
+
+    def __init__(self):
+        self.in_quotes = False
+        self.multiline = False # a newline was found inside a quoted field
+        self._records = 0 # completed non-blank records
+        self._quote_pending = False # the last byte was a quote inside a quoted field
+        self._last = NEWLINE # previous byte; the start of the input is a field start
+        self._blank = True # the current record holds only whitespace so far
+
+    @property
+    def records(self):
+        """Non-blank records so far, counting an unterminated last record."""
+        return self._records + (0 if self._blank else 1)
+
+    def feed(self, data):
+        """Scans the next block of the file."""
+        if not data:
+            return
+        if self.in_quotes or b'"' in data:
+            self._feed_quoted(data)
+        else:
+            self._feed_plain(data)
+        self._last = data[-1]
+
+    def _feed_plain(self, data):
+        """Block without quotes outside a quoted field: every newline ends a record."""
+        ends = data.count(b'\n')
+        if not ends:
+            self._blank = self._blank and not data.strip()
+            return
+        blank = len(BLANK_LINE.findall(data))
+        if self._blank and not data[:data.index(b'\n')].strip():
+            blank += 1
+        self._records += ends - blank
+        self._blank = not data[data.rindex(b'\n') + 1:].strip()
+
+    def _feed_quoted(self, data):
+        in_quotes = self.in_quotes
+        pending_at = -1 if self._quote_pending else None
+        start = 0 # start of the current record in 'data'
+        for match in SPECIAL_BYTES.finditer(data):
+            i = match.start()
+            if pending_at is not None:
+                escaped = i == pending_at + 1 and data[i] == QUOTE
+                pending_at = None
+                if escaped:
+                    continue
+                in_quotes = False # The pending quote closed the field
+            if data[i] == NEWLINE:
+                if in_quotes:
+                    self.multiline = True
+                    continue
+                if not (self._blank and not data[start:i].strip()):
+                    self._records += 1
+                self._blank = True
+                start = i + 1
+            elif in_quotes:
+                pending_at = i # Closes the field unless another quote follows
+            elif (data[i - 1] if i else self._last) in (COMMA, NEWLINE):
+                in_quotes = True
+
+        self._quote_pending = pending_at == len(data) - 1
+        if pending_at is not None and not self._quote_pending:
+            in_quotes = False
+        self.in_quotes = in_quotes
+        self._blank = self._blank and not data[start:].strip()
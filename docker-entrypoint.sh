@@ -17,5 +17,7 @@ echo "Flask DB initialization complete."
 
 # Start the main application process using Gunicorn
 echo "Starting Gunicorn server..."
-exec gunicorn -b :${PORT} --workers 2 --threads 4 app:app
+# Progress streams (SSE) hold a thread each, at most SSE_MAX_STREAMS per worker;
+# the remaining threads serve uploads, listings and the API
+exec gunicorn -b :${PORT} --workers ${GUNICORN_WORKERS:-2} --threads ${GUNICORN_THREADS:-8} app:app
 echo "Gunicorn exited." # This line will likely not be reached due to exec
\ No newline at end of file
@@ -0,0 +1,49 @@
+import json
+
+# Redis keys of the per-event-type buffer and its "flush scheduled" flag
+BUFFER_KEY = "webhook:buffer:{event_type}"
+FLUSH_KEY = "webhook:buffer:{event_type}:flush"
+
+
+def buffer_event(client, event_type, payload):
+    """Appends an event to the buffer of its type. Returns the buffer length."""
+    return client.rpush(BUFFER_KEY.format(event_type=event_type), json.dumps(payload))
+
+
+def claim_flush(client, event_type, window):
+    """
+    Marks a flush of this event type as scheduled. Returns True for the first
+    event of a window, whose publisher must schedule the flush.
+    """
+    # The expiry only guards against a lost flush task; drain_events clears the flag
+    return bool(client.set(FLUSH_KEY.format(event_type=event_type), 1, nx=True, ex=max(int(window * 10), 60)))
+
+
+def drain_events(client, event_type):
+    """
+    Atomically takes all buffered events of a type and clears the flush flag,
+    so the next event published afterwards schedules a new flush.
+    """
+    pipe = client.pipeline(transaction=True)
+    pipe.delete(FLUSH_KEY.format(event_type=event_type))
+    pipe.lrange(BUFFER_KEY.format(event_type=event_type), 0, -1)
+    pipe.delete(BUFFER_KEY.format(event_type=event_type))
+    _, raw_events, _ = pipe.execute()
+    return [json.loads(raw) for raw in raw_events]
+
+
+def coalesce(events):
+    """
+    Collapses events per product_id to the latest state, keeping first-seen order.
+    For updates the 'old_data' of the first event is kept, so a subscriber sees
+    the full change over the window. Events without a product_id are kept as-is.
+    """
+    collapsed = {}
+    for index, event in enumerate(events):
+        product_id = event.get('product_id')
+        key = product_id if product_id is not None else f"event-{index}"
+        previous = collapsed.get(key)
+        if previous is not None and 'changes' in previous and 'changes' in event:
+            event = {**event, 'changes': {**event['changes'], 'old_data': previous['changes'].get('old_data')}}
+        collapsed[key] = event
+    return list(collapsed.values())
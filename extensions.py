@@ -1,8 +1,27 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from celery import Celery
+import redis
 
 db = SQLAlchemy()
 
+def get_redis():
+    """
+    Returns the shared Redis client of the current app, created on first use.
+    Cache, progress and metrics calls run on the request path, so the client has
+    short socket timeouts: a hanging Redis fails them (callers fall back or drop
+    the update) instead of stalling every Gunicorn thread.
+    """
+    client = current_app.extensions.get('redis')
+    if client is None:
+        client = redis.Redis.from_url(
+            current_app.config["REDIS_URL"],
+            socket_timeout=current_app.config.get("REDIS_SOCKET_TIMEOUT", 1.0),
+            socket_connect_timeout=current_app.config.get("REDIS_CONNECT_TIMEOUT", 1.0),
+        )
+        current_app.extensions['redis'] = client
+    return client
+
 def make_celery(app):
     celery = Celery(
         app.import_name
@@ -10,7 +29,40 @@ def make_celery(app):
     celery.conf.update({
         "broker_url": app.config["CELERY_BROKER_URL"],
         "result_backend": app.config["CELERY_RESULT_BACKEND"],
-        "include": ["tasks"]
+        "include": ["tasks"],
+        # Separate queues so long imports never delay webhook delivery or interactive
+        # tests; each queue gets its own worker (see docker-compose.yml)
+        "task_routes": {
+            "tasks.import_products_task": {"queue": "imports"},
+            "tasks.import_products_resumable_task": {"queue": "imports"},
+            "tasks.import_shard_task": {"queue": "imports"},
+            "tasks.finalize_import_task": {"queue": "imports"},
+            "tasks.bulk_products_task": {"queue": "imports"},
+            "tasks.delete_all_products_task": {"queue": "imports"},
+            "tasks.send_webhook_event_task": {"queue": "webhooks"},
+            "tasks.retry_webhook_delivery_task": {"queue": "webhooks"},
+            "tasks.flush_webhook_batch_task": {"queue": "webhooks"},
+            "tasks.relay_outbox_task": {"queue": "webhooks"},
+            "tasks.purge_webhook_deliveries_task": {"queue": "webhooks"},
+            "tasks.test_webhook_task": {"queue": "interactive"},
+        },
+        # Workers reserve one task at a time unless told otherwise (--prefetch-multiplier),
+        # so a queued short task is not stuck behind a long one on the same worker
+        "worker_prefetch_multiplier": 1,
+        # Redis redelivers unacknowledged (late-ack) messages after this many seconds,
+        # so it must exceed the longest import or a running import starts a second time
+        "broker_transport_options": {"visibility_timeout": app.config.get("CELERY_VISIBILITY_TIMEOUT", 43200)},
+        # Periodic tasks, run by the separate celery beat service (or a worker started with --beat)
+        "beat_schedule": {
+            "purge-webhook-deliveries": {
+                "task": "tasks.purge_webhook_deliveries_task",
+                "schedule": 3600.0,
+            },
+            "relay-outbox": {
+                "task": "tasks.relay_outbox_task",
+                "schedule": app.config.get("OUTBOX_RELAY_INTERVAL", 2.0),
+            },
+        },
     })
 
     class ContextTask(celery.Task):
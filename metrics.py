@@ -0,0 +1,171 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import redis
+
+# Metrics are aggregated in Redis, so the web and worker processes (and
+# containers) feed the same counters and /metrics can render them all.
+METRIC_KEY = "metrics:{name}"
+
+# Histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+IMPORT_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named stage of a piece of work."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def iter(self, name, iterable):
+        """Iterates 'iterable', counting the time spent producing each item as stage 'name'."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def merge(self, seconds):
+        """Adds another timer's (or a task result's) per-stage seconds."""
+        for name, value in dict(seconds).items():
+            self.seconds[name] += value
+        return self
+
+    def take(self):
+        """Returns the per-stage seconds collected so far and starts over."""
+        seconds, self.seconds = self.seconds, defaultdict(float)
+        return seconds
+
+    def as_dict(self):
+        return {name: round(value, 4) for name, value in self.seconds.items()}
+
+
+def _label_key(labels):
+    return ",".join(f'{name}="{value}"' for name, value in sorted(labels.items()))
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.type = 'counter'
+
+    def inc(self, pipe, amount=1, **labels):
+        pipe.hincrbyfloat(METRIC_KEY.format(name=self.name), _label_key(labels), amount)
+
+    def samples(self, fields):
+        for label_key, value in sorted(fields.items()):
+            yield f"{self.name}{{{label_key}}}" if label_key else self.name, value
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.type = 'histogram'
+
+    def observe(self, pipe, value, **labels):
+        key = METRIC_KEY.format(name=self.name)
+        label_key = _label_key(labels)
+        # Buckets are cumulative: the observation counts in every bucket it fits
+        for bound in self.buckets:
+            if value <= bound:
+                pipe.hincrbyfloat(key, f"{label_key}|{bound}", 1)
+        pipe.hincrbyfloat(key, f"{label_key}|+Inf", 1)
+        pipe.hincrbyfloat(key, f"{label_key}|sum", value)
+
+    def samples(self, fields):
+        series = defaultdict(dict)
+        for field, value in fields.items():
+            label_key, _, part = field.rpartition('|')
+            series[label_key][part] = value
+        for label_key, parts in sorted(series.items()):
+            prefix = f"{label_key}," if label_key else ""
+            for bound in self.buckets:
+                yield f'{self.name}_bucket{{{prefix}le="{bound}"}}', parts.get(str(bound), 0.0)
+            yield f'{self.name}_bucket{{{prefix}le="+Inf"}}', parts.get('+Inf', 0.0)
+            suffix = f"{{{label_key}}}" if label_key else ""
+            yield f"{self.name}_sum{suffix}", parts.get('sum', 0.0)
+            yield f"{self.name}_count{suffix}", parts.get('+Inf', 0.0)
+
+
+IMPORT_STAGE_SECONDS = Counter('csvupload_import_stage_seconds_total', 'Seconds spent per import stage.')
+IMPORT_ROWS = Counter('csvupload_import_rows_total', 'CSV rows imported.')
+IMPORT_BYTES = Counter('csvupload_import_bytes_total', 'CSV bytes consumed by imports.')
+IMPORTS = Counter('csvupload_imports_total', 'Finished import tasks by outcome.')
+IMPORT_DURATION = Histogram('csvupload_import_duration_seconds', 'Duration of import tasks.', IMPORT_BUCKETS)
+WEBHOOK_DELIVERIES = Counter('csvupload_webhook_deliveries_total', 'Webhook deliveries by event type and status class.')
+WEBHOOK_LATENCY = Histogram('csvupload_webhook_delivery_seconds', 'Webhook delivery latency.')
+HTTP_REQUEST_LATENCY = Histogram('csvupload_http_request_duration_seconds', 'Flask request latency per route.')
+
+REGISTRY = [IMPORT_STAGE_SECONDS, IMPORT_ROWS, IMPORT_BYTES, IMPORTS, IMPORT_DURATION,
+            WEBHOOK_DELIVERIES, WEBHOOK_LATENCY, HTTP_REQUEST_LATENCY]
+
+
+@contextmanager
+def recording(client):
+    """Pipeline for metric updates, sent in one round trip; metrics are dropped if Redis is down."""
+    pipe = client.pipeline(transaction=False)
+    yield pipe
+    try:
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Could not record metrics: {e}")
+
+
+def record_import_chunk(client, stage_seconds, rows, byte_count):
+    with recording(client) as pipe:
+        for stage, seconds in stage_seconds.items():
+            IMPORT_STAGE_SECONDS.inc(pipe, seconds, stage=stage)
+        IMPORT_ROWS.inc(pipe, rows)
+        IMPORT_BYTES.inc(pipe, byte_count)
+
+
+def record_import(client, outcome, duration):
+    with recording(client) as pipe:
+        IMPORTS.inc(pipe, outcome=outcome)
+        IMPORT_DURATION.observe(pipe, duration)
+
+
+def record_webhook_deliveries(client, event_type, results):
+    with recording(client) as pipe:
+        for result in results:
+            status = f"{result['status_code'] // 100}xx" if result['status_code'] else 'error'
+            WEBHOOK_DELIVERIES.inc(pipe, event_type=event_type, status=status)
+            if result['status_code']:
+                # response_time is in milliseconds
+                WEBHOOK_LATENCY.observe(pipe, result['response_time'] / 1000, event_type=event_type)
+
+
+def record_request(client, method, route, status, duration):
+    with recording(client) as pipe:
+        HTTP_REQUEST_LATENCY.observe(pipe, duration, method=method, route=route, status=status)
+
+
+def render_metrics(client):
+    """All metrics in the Prometheus text exposition format."""
+    pipe = client.pipeline(transaction=False)
+    for metric in REGISTRY:
+        pipe.hgetall(METRIC_KEY.format(name=metric.name))
+    lines = []
+    for metric, fields in zip(REGISTRY, pipe.execute()):
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        decoded = {field.decode(): float(value) for field, value in fields.items()}
+        for sample, value in metric.samples(decoded):
+            lines.append(f"{sample} {int(value) if value.is_integer() else value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,7 @@
+-- V10__webhook_circuit_breaker.sql
+-- Per-endpoint health of webhooks: consecutive failed deliveries and, once
+-- WEBHOOK_BREAKER_THRESHOLD is reached, the time until which the circuit is
+-- open and deliveries are parked in the retry queue.
+
+ALTER TABLE webhook ADD COLUMN IF NOT EXISTS consecutive_failures INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE webhook ADD COLUMN IF NOT EXISTS circuit_open_until TIMESTAMP WITHOUT TIME ZONE;
@@ -0,0 +1,6 @@
+-- V11__imported_file_catalog_version.sql
+-- Product listing generation right after a file was imported. An identical
+-- upload is only skipped while the catalog is unchanged since then; any later
+-- product write (edit, delete, bulk action, another import) bumps the generation.
+
+ALTER TABLE imported_file ADD COLUMN IF NOT EXISTS catalog_version BIGINT;
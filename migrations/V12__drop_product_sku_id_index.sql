@@ -0,0 +1,7 @@
+-- V12__drop_product_sku_id_index.sql
+-- The (sku, id) keyset index created by earlier versions of V7 is redundant:
+-- sku is UNIQUE, so its own index already gives a total order. Dropping it
+-- saves one index update per product write.
+-- DROP INDEX CONCURRENTLY cannot run inside a transaction: apply with plain psql.
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_product_sku_id;
@@ -0,0 +1,7 @@
+-- V13__imported_file_catalog_version_epoch.sql
+-- The catalog version is now the listing cache generation together with an epoch
+-- of the Redis data set ('epoch:counter'), so a counter that restarts from 0 after
+-- a Redis restart or flush never matches a version recorded before it. Versions
+-- recorded as plain counters are dropped: those files are simply imported again.
+
+ALTER TABLE imported_file ALTER COLUMN catalog_version TYPE VARCHAR(64) USING NULL;
@@ -0,0 +1,14 @@
+-- V2__unique_upper_sku.sql
+-- Make the case-insensitive SKU index unique so bulk imports can merge with
+-- INSERT ... ON CONFLICT (upper(sku)) DO UPDATE.
+
+-- Note: this fails if the table already holds SKUs that differ only by case.
+-- Resolve those duplicates before applying the migration.
+--
+-- The unique index is built CONCURRENTLY before the old one is dropped, so writes
+-- to product are not blocked and upper(sku) lookups stay indexed throughout.
+-- CONCURRENTLY cannot run inside a transaction: apply this file with plain psql
+-- (no --single-transaction / -1). A failed build leaves an INVALID index that
+-- IF NOT EXISTS would skip; drop it and re-run.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_product_sku_upper ON product (upper(sku));
+DROP INDEX CONCURRENTLY IF EXISTS idx_product_sku_upper;
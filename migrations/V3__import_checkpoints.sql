@@ -0,0 +1,15 @@
+-- V3__import_checkpoints.sql
+-- Checkpoints for resumable imports: one row per uploaded file (and shard),
+-- updated in the same transaction as each committed chunk.
+
+CREATE TABLE IF NOT EXISTS import_checkpoint (
+    id SERIAL PRIMARY KEY,
+    filepath VARCHAR(500) NOT NULL,
+    shard INTEGER NOT NULL DEFAULT 0,
+    task_id VARCHAR(155),
+    byte_offset BIGINT NOT NULL DEFAULT 0,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    updated_at TIMESTAMP WITHOUT TIME ZONE,
+    CONSTRAINT uq_import_checkpoint_file_shard UNIQUE (filepath, shard)
+);
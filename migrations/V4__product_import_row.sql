@@ -0,0 +1,6 @@
+-- V4__product_import_row.sql
+-- Track which upload (and which row of it) last wrote a product, so shards of
+-- one file imported in parallel keep last-row-wins semantics for duplicate SKUs.
+
+ALTER TABLE product ADD COLUMN IF NOT EXISTS import_id VARCHAR(100);
+ALTER TABLE product ADD COLUMN IF NOT EXISTS import_row BIGINT;
@@ -0,0 +1,14 @@
+-- V5__imported_files.sql
+-- Content hashes of successfully imported uploads, so re-sent identical files
+-- short-circuit to "already imported" without touching the product table.
+
+CREATE TABLE IF NOT EXISTS imported_file (
+    id SERIAL PRIMARY KEY,
+    sha256 VARCHAR(64) UNIQUE NOT NULL,
+    filepath VARCHAR(500),
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    inserted INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    imported_at TIMESTAMP WITHOUT TIME ZONE
+);
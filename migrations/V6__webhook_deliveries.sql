@@ -0,0 +1,16 @@
+-- V6__webhook_deliveries.sql
+-- Delivery history of webhooks, written in one batch per dispatch and pruned
+-- by the periodic purge_webhook_deliveries_task.
+
+CREATE TABLE IF NOT EXISTS webhook_delivery (
+    id BIGSERIAL PRIMARY KEY,
+    webhook_id INTEGER NOT NULL REFERENCES webhook (id) ON DELETE CASCADE,
+    event_type VARCHAR(100) NOT NULL,
+    status_code INTEGER,
+    response_time DOUBLE PRECISION,
+    triggered_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_webhook_delivery_webhook_id ON webhook_delivery (webhook_id);
+-- Retention cleanup deletes by age
+CREATE INDEX IF NOT EXISTS ix_webhook_delivery_triggered_at ON webhook_delivery (triggered_at);
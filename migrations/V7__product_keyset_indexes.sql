@@ -0,0 +1,16 @@
+-- V7__product_keyset_indexes.sql
+-- Composite (sort key, id) indexes for keyset pagination of /products.
+-- The expressions must match KEYSET_SORT_KEYS in repositories/product_repository.py.
+-- Sorting by SKU needs no extra index: sku is UNIQUE and a total order on its own.
+--
+-- Indexes are built CONCURRENTLY so writes to product are not blocked during the
+-- build. CONCURRENTLY cannot run inside a transaction: apply this file with plain
+-- psql (no --single-transaction / -1). A failed build leaves an INVALID index that
+-- IF NOT EXISTS would skip; drop it and re-run.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_name_id ON product ((coalesce(name, '')), id);
+-- Descriptions are sorted by their first 200 characters to keep index entries small
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_description_id ON product ((coalesce(substr(description, 1, 200), '')), id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_active_id ON product (active, id);
+-- Common combination: status filter + sort by name
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_active_name_id ON product (active, (coalesce(name, '')), id);
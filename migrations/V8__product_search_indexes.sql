@@ -0,0 +1,20 @@
+-- V8__product_search_indexes.sql
+-- Search indexes for the products listing:
+--   * pg_trgm GIN indexes, used by substring searches (ILIKE '%value%')
+--   * a GIN index over the full-text document of name + description, used by
+--     the ranked full-text search. The expression must match SEARCH_DOCUMENT
+--     in repositories/product_repository.py.
+--
+-- Indexes are built CONCURRENTLY so writes to product are not blocked during the
+-- build. CONCURRENTLY cannot run inside a transaction: apply this file with plain
+-- psql (no --single-transaction / -1). A failed build leaves an INVALID index that
+-- IF NOT EXISTS would skip; drop it and re-run.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_sku_trgm ON product USING gin (sku gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_name_trgm ON product USING gin (name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_description_trgm ON product USING gin (description gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_search_document ON product
+    USING gin (to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, '')));
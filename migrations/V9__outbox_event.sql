@@ -0,0 +1,10 @@
+-- V9__outbox_event.sql
+-- Transactional outbox: product change events are inserted in the same
+-- transaction as the change and drained in id order by relay_outbox_task.
+
+CREATE TABLE IF NOT EXISTS outbox_event (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSON NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
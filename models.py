@@ -7,6 +7,19 @@ class Product(db.Model):
     name = db.Column(db.String(200))
     description = db.Column(db.Text)
     active = db.Column(db.Boolean, default=True)
+    # Source of the last import write: upload id and row order within that file
+    import_id = db.Column(db.String(100), nullable=True)
+    import_row = db.Column(db.BigInteger, nullable=True)
+
+    __table_args__ = (
+        # Arbiter index for INSERT ... ON CONFLICT (upper(sku)) in bulk imports
+        db.Index('uq_product_sku_upper', db.func.upper(sku), unique=True),
+        # (sort key, id) indexes for keyset pagination of the products listing
+        db.Index('ix_product_name_id', db.func.coalesce(name, ''), id),
+        db.Index('ix_product_description_id', db.func.coalesce(db.func.substr(description, 1, 200), ''), id),
+        db.Index('ix_product_active_id', active, id),
+        db.Index('ix_product_active_name_id', active, db.func.coalesce(name, ''), id),
+    )
 
 class Webhook(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -16,6 +29,68 @@ class Webhook(db.Model):
     last_triggered = db.Column(db.DateTime, nullable=True)
     last_status_code = db.Column(db.Integer, nullable=True)
     last_response_time = db.Column(db.Float, nullable=True)
+    # Circuit breaker: deliveries are parked for retry while circuit_open_until is in the future
+    consecutive_failures = db.Column(db.Integer, nullable=False, default=0)
+    circuit_open_until = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Webhook {self.event_type} - {self.url}>"
+
+
+class WebhookDelivery(db.Model):
+    """One delivery attempt of a webhook, kept for WEBHOOK_DELIVERY_RETENTION_DAYS."""
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    webhook_id = db.Column(db.Integer, db.ForeignKey('webhook.id', ondelete='CASCADE'), nullable=False, index=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    status_code = db.Column(db.Integer)
+    response_time = db.Column(db.Float)
+    triggered_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<WebhookDelivery {self.webhook_id} {self.event_type} - {self.status_code}>"
+
+class ImportCheckpoint(db.Model):
+    """Progress of a resumable import, committed together with each chunk."""
+    id = db.Column(db.Integer, primary_key=True)
+    filepath = db.Column(db.String(500), nullable=False)
+    shard = db.Column(db.Integer, nullable=False, default=0)
+    task_id = db.Column(db.String(155))
+    byte_offset = db.Column(db.BigInteger, nullable=False, default=0)
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='running') # 'running' or 'complete'
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('filepath', 'shard', name='uq_import_checkpoint_file_shard'),
+    )
+
+    def __repr__(self):
+        return f"<ImportCheckpoint {self.filepath}#{self.shard} - {self.rows_done} rows>"
+
+
+class ImportedFile(db.Model):
+    """Content fingerprint and summary of a successfully imported upload."""
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    filepath = db.Column(db.String(500))
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    unchanged = db.Column(db.Integer, nullable=False, default=0)
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Product listing generation ('epoch:counter') right after the import; the file only counts as applied while it matches
+    catalog_version = db.Column(db.String(64), nullable=True)
+
+    def __repr__(self):
+        return f"<ImportedFile {self.sha256[:12]} - {self.rows_processed} rows>"
+
+
+class OutboxEvent(db.Model):
+    """Product change event, written in the transaction of the change and relayed to webhooks."""
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     def __repr__(self):
-        return f"<Webhook {self.event_type} - {self.url}>"
\ No newline at end of file
+        return f"<OutboxEvent {self.id} {self.event_type}>"
@@ -0,0 +1,85 @@
+import json
+import time
+
+import redis
+
+# Redis pub/sub channel carrying the progress updates of one task
+PROGRESS_CHANNEL = "progress:{task_id}"
+TERMINAL_STATES = ('SUCCESS', 'FAILURE', 'REVOKED')
+
+
+def publish_progress(client, task_id, state, meta):
+    """Publishes a status update ({'state', 'status', 'progress', ...}) to the task's channel."""
+    try:
+        client.publish(PROGRESS_CHANNEL.format(task_id=task_id), json.dumps({'state': state, **meta}))
+    except redis.RedisError as e:
+        # Progress is still stored in the result backend for polling clients
+        print(f"Could not publish progress of task {task_id}: {e}")
+
+
+class ProgressReporter:
+    """
+    Reports the progress of a task to the Celery result backend (read by
+    /status polling) and publishes it on Redis pub/sub (read by the SSE stream),
+    at most once per 'interval' seconds.
+    """
+
+    def __init__(self, task, client, task_id=None, interval=0.25):
+        self.task = task
+        self.client = client
+        self.task_id = task_id or task.request.id
+        self.interval = interval
+        self._last_report = None
+
+    def due(self):
+        """True if the next report() would not exceed the rate limit."""
+        return self._last_report is None or time.monotonic() - self._last_report >= self.interval
+
+    def report(self, meta):
+        self._last_report = time.monotonic()
+        self.task.update_state(task_id=self.task_id, state='PROGRESS', meta=meta)
+        publish_progress(self.client, self.task_id, 'PROGRESS', meta)
+
+    def finish(self, state, meta):
+        """Publishes the final state; Celery stores the result (or failure) itself."""
+        publish_progress(self.client, self.task_id, state, meta)
+
+
+def format_sse(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def iter_progress_events(client, task_id, get_status, idle_timeout=5, max_duration=300):
+    """
+    Yields Server-Sent Events for a task: its current status first, then each
+    published update until a final state. 'get_status()' returns the status
+    from the result backend; it is re-checked while the channel is idle, so a
+    missed final update (e.g. a crashed worker) still ends the stream.
+    The stream closes after 'max_duration' seconds; EventSource reconnects.
+    """
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(PROGRESS_CHANNEL.format(task_id=task_id))
+    try:
+        # Read after subscribing, so no update falls in between
+        data = get_status()
+        yield format_sse(data)
+        if data['state'] in TERMINAL_STATES:
+            return
+
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=idle_timeout)
+            if message is None:
+                data = get_status()
+                if data['state'] in TERMINAL_STATES:
+                    yield format_sse(data)
+                    return
+                yield ": keep-alive\n\n"
+                continue
+
+            data = json.loads(message['data'])
+            yield format_sse(data)
+            if data['state'] in TERMINAL_STATES:
+                return
+    finally:
+        pubsub.close()
@@ -1,2 +1,6 @@
 from .product_repository import ProductRepository
-from .webhook_repository import WebhookRepository
\ No newline at end of file
+from .webhook_repository import WebhookRepository
+from .import_checkpoint_repository import ImportCheckpointRepository
+from .imported_file_repository import ImportedFileRepository
+from .outbox_repository import OutboxRepository
+from .pagination import KeysetPage
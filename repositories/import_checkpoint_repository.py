@@ -0,0 +1,45 @@
+from extensions import db
+from models import ImportCheckpoint
+from sqlalchemy import func
+
+
+class ImportCheckpointRepository:
+    def get(self, filepath, shard=0):
+        """Fetches the checkpoint of a file (and shard), if any."""
+        return ImportCheckpoint.query.filter_by(filepath=filepath, shard=shard).first()
+
+    def start(self, filepath, task_id, shard=0):
+        """
+        Returns the checkpoint to resume from, creating a fresh one if the file
+        has not been imported before. The current task takes ownership of it.
+        """
+        checkpoint = self.get(filepath, shard)
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(filepath=filepath, shard=shard, byte_offset=0, rows_done=0)
+            db.session.add(checkpoint)
+        checkpoint.task_id = task_id
+        db.session.commit()
+        return checkpoint
+
+    def advance(self, checkpoint, byte_offset, rows_done):
+        """
+        Records the position after a chunk. Not committed here: the caller commits
+        it together with the chunk so both become durable atomically.
+        """
+        checkpoint.byte_offset = byte_offset
+        checkpoint.rows_done = rows_done
+
+    def complete(self, checkpoint):
+        """Marks the import as finished."""
+        checkpoint.status = 'complete'
+        db.session.commit()
+        return checkpoint
+
+    def total_rows_done(self, filepath):
+        """Sums committed rows over all shards of a file."""
+        return db.session.query(func.coalesce(func.sum(ImportCheckpoint.rows_done), 0)).filter_by(filepath=filepath).scalar()
+
+    def byte_offsets(self, filepath):
+        """Returns the committed byte offset of every shard of a file, keyed by shard."""
+        rows = db.session.query(ImportCheckpoint.shard, ImportCheckpoint.byte_offset).filter_by(filepath=filepath)
+        return dict(rows.all())
@@ -0,0 +1,42 @@
+from extensions import db
+from models import ImportedFile
+
+
+class ImportedFileRepository:
+    def get_by_sha256(self, sha256):
+        """Fetches the import record of a file with this content hash, if any."""
+        if not sha256:
+            return None
+        return ImportedFile.query.filter_by(sha256=sha256).first()
+
+    def get_applied(self, sha256, catalog_version):
+        """
+        Fetches the import record of a file with this content hash if the catalog
+        is unchanged since that import ('catalog_version' is the current product
+        listing generation). Returns None if the generation is unknown.
+        """
+        imported_file = self.get_by_sha256(sha256)
+        if imported_file is None or catalog_version is None or imported_file.catalog_version != catalog_version:
+            return None
+        return imported_file
+
+    def record(self, sha256, filepath, rows_processed, counts, catalog_version=None):
+        """Remembers a successfully imported file, its summary counts and the catalog generation after it."""
+        imported_file = self.get_by_sha256(sha256)
+        if imported_file is None:
+            imported_file = ImportedFile(sha256=sha256)
+            db.session.add(imported_file)
+        imported_file.filepath = filepath
+        imported_file.rows_processed = rows_processed
+        imported_file.inserted = counts['inserted']
+        imported_file.updated = counts['updated']
+        imported_file.unchanged = counts['unchanged']
+        imported_file.catalog_version = catalog_version
+        db.session.commit()
+        return imported_file
+
+    def clear(self, commit=True):
+        """Forgets all imported files, e.g. once their products were deleted."""
+        ImportedFile.query.delete(synchronize_session=False)
+        if commit:
+            db.session.commit()
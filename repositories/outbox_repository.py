@@ -0,0 +1,32 @@
+from extensions import db
+from models import OutboxEvent
+
+
+class OutboxRepository:
+    def add(self, event_type, payload):
+        """
+        Adds an event to the outbox without committing, so it becomes durable
+        in the same transaction as the change it describes.
+        """
+        event = OutboxEvent(event_type=event_type, payload=payload)
+        db.session.add(event)
+        return event
+
+    def claim_batch(self, limit):
+        """
+        Oldest pending events, locked until the caller commits. SKIP LOCKED lets
+        concurrent relays take different batches instead of waiting.
+        """
+        return (OutboxEvent.query
+                .order_by(OutboxEvent.id)
+                .with_for_update(skip_locked=True)
+                .limit(limit)
+                .all())
+
+    def delete(self, events):
+        """Removes relayed events; the caller commits."""
+        if events:
+            OutboxEvent.query.filter(OutboxEvent.id.in_([event.id for event in events])).delete(synchronize_session=False)
+
+    def pending_count(self):
+        return OutboxEvent.query.count()
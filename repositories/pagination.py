@@ -0,0 +1,66 @@
+import base64
+import binascii
+import json
+from flask_sqlalchemy.pagination import Pagination
+
+
+def encode_cursor(sort_by, key, product_id, direction):
+    """Opaque token for the position after (or before) a row in keyset pagination."""
+    raw = json.dumps({'s': sort_by, 'k': key, 'i': product_id, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_by):
+    """
+    Decodes a cursor token. Returns None for a missing or malformed token, or one
+    issued for another sort column, so the listing starts from the first page.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(data, dict) or data.get('s') != sort_by or not isinstance(data.get('i'), int):
+        return None
+    # Sort keys are booleans for 'active' and strings otherwise; anything else was tampered with
+    if not isinstance(data.get('k'), bool if sort_by == 'active' else str):
+        return None
+    return {'key': data['k'], 'id': data['i'], 'direction': 'prev' if data.get('d') == 'prev' else 'next'}
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing, with cursors to its neighbours."""
+    keyset = True
+    page = None # Keyset pages have no page number
+
+    def __init__(self, items, per_page, next_cursor, prev_cursor, total, total_is_exact):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_exact = total_is_exact
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+class CachedPage(Pagination):
+    """
+    A page of an offset-paginated listing rebuilt from the result cache; behaves
+    like the Pagination returned by query.paginate() (iter_pages, prev_num, ...).
+    """
+    keyset = False
+
+    def _query_items(self):
+        return self._query_args['items']
+
+    def _query_count(self):
+        return self._query_args['total']
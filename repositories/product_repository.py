@@ -1,24 +1,158 @@
+import io
 from extensions import db
 from models import Product
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, text, tuple_
+from cache import VersionedCache, ResultCache
+from metrics import StageTimer
+from .pagination import KeysetPage, CachedPage, encode_cursor, decode_cursor
+
+# Sort keys of keyset pagination; each has a matching (key, id) index (V7 migration),
+# except the unique SKU, which is a total order on its own (UNIQUE index on sku)
+KEYSET_SORT_KEYS = {
+    'sku': Product.sku,
+    'name': func.coalesce(Product.name, ''),
+    'description': func.coalesce(func.substr(Product.description, 1, 200), ''),
+    'active': Product.active,
+}
+
+# Full-text search document over name + description; must match the GIN
+# expression index of the V8 migration so PostgreSQL can use it
+SEARCH_CONFIG = 'english'
+SEARCH_DOCUMENT = func.to_tsvector(SEARCH_CONFIG, func.coalesce(Product.name, '') + ' ' + func.coalesce(Product.description, ''))
+
+# Short-lived cache of filtered product counts (approximate totals)
+count_cache = VersionedCache('product_counts', ttl=60)
+
+# Cached offset-paginated listing pages; every product write bumps its generation
+listing_cache = ResultCache('product_listings', ttl=300)
+LISTING_COLUMNS = [column.name for column in Product.__table__.columns]
+
+# Product fields served by the JSON API (import bookkeeping columns stay internal)
+API_FIELDS = ['id', 'sku', 'name', 'description', 'active']
+
+# Per-transaction staging table used by the PostgreSQL COPY import path
+STAGING_TABLE = "product_import_staging"
+
+CREATE_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        row_num BIGINT,
+        sku TEXT,
+        name TEXT,
+        description TEXT
+    ) ON COMMIT DROP
+"""
+
+COPY_STAGING_SQL = f"""
+    COPY {STAGING_TABLE} (row_num, sku, name, description)
+    FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (sku, name, description))
+"""
+
+# The staged chunk is already de-duplicated by normalize_chunk(), so each SKU
+# appears once and never touches the same target row twice. Existing products
+# are updated first and only SKUs still missing are inserted: INSERT ... ON
+# CONFLICT would draw a product id from the sequence for every staged row,
+# including updated and unchanged ones, burning through the int4 id range on
+# every re-sent catalog. Rows are locked in SKU order to keep lock order
+# consistent between shards.
+UPDATE_STAGING_SQL = f"""
+    UPDATE product
+    SET name = staged.name,
+        description = staged.description,
+        active = staged.active,
+        import_id = staged.import_id,
+        import_row = staged.import_row
+    FROM (
+        SELECT product.id, s.name, s.description, TRUE AS active,
+               %(import_id)s::text AS import_id, s.row_num AS import_row
+        FROM {STAGING_TABLE} s
+        JOIN product ON upper(product.sku) = upper(s.sku)
+        ORDER BY upper(s.sku)
+        FOR UPDATE OF product
+    ) AS staged
+    WHERE product.id = staged.id
+      AND ({{where}})
+"""
+
+# A concurrent import (another shard) may insert the same SKU after the
+# NOT EXISTS check; ON CONFLICT still merges those rows. RETURNING reports only
+# rows actually written; xmax = 0 marks fresh inserts.
+INSERT_STAGING_SQL = f"""
+    INSERT INTO product (sku, name, description, active, import_id, import_row)
+    SELECT sku, name, description, TRUE, %(import_id)s, row_num
+    FROM {STAGING_TABLE} s
+    WHERE NOT EXISTS (SELECT 1 FROM product WHERE upper(product.sku) = upper(s.sku))
+    ORDER BY upper(sku)
+    ON CONFLICT (upper(sku)) DO UPDATE
+    SET name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        active = EXCLUDED.active,
+        import_id = EXCLUDED.import_id,
+        import_row = EXCLUDED.import_row
+    WHERE {{where}}
+    RETURNING (xmax = 0) AS inserted
+"""
+
+# Serial imports apply rows in file order, so a row whose values already match
+# the stored product can be skipped (no write, no WAL). '{new}' is the incoming
+# row: 'staged' in the UPDATE, 'EXCLUDED' in the INSERT.
+CHANGED_ROWS_WHERE = """
+    (product.name, product.description, product.active)
+    IS DISTINCT FROM ({new}.name, {new}.description, {new}.active)
+"""
+
+# Shards of one file run in any order: within an import a row only overwrites a
+# product written by an earlier (or the same) row, which keeps last-row-wins.
+# Unchanged rows must still be written so that earlier rows cannot win later.
+ROW_ORDER_WHERE = """
+    product.import_id IS DISTINCT FROM {new}.import_id
+    OR product.import_row <= {new}.import_row
+"""
+
+# Columns produced by normalize_chunk(), in staging/COPY order
+IMPORT_COLUMNS = ['sku', 'name', 'description']
+
+
+def normalize_chunk(chunk):
+    """
+    Vectorized clean-up of a raw CSV chunk: strips and upper-cases SKUs, fills
+    missing name/description columns and drops in-chunk duplicates (last row wins).
+    Returns a DataFrame with the IMPORT_COLUMNS plus 'sku_upper', indexed by row number.
+    """
+    normalized = chunk.reindex(columns=IMPORT_COLUMNS, fill_value='')
+    normalized['sku'] = normalized['sku'].astype(str).str.strip()
+    normalized['sku_upper'] = normalized['sku'].str.upper()
+    return normalized.drop_duplicates(subset='sku_upper', keep='last')
+
 
 class ProductRepository:
-    def create(self, sku, name, description, active=True):
-        """Creates a new product."""
+    def create(self, sku, name, description, active=True, commit=True):
+        """
+        Creates a new product.
+        With commit=False the product is only flushed (so it has an id) and the
+        caller commits it with commit(), e.g. together with an outbox event.
+        """
         product = Product(sku=sku, name=name, description=description, active=active)
         db.session.add(product)
-        db.session.commit()
+        self._finish(commit)
         return product
 
+    def commit(self):
+        """Commits pending product changes and invalidates the cached listings."""
+        db.session.commit()
+        self.invalidate_listings()
+
+    def _finish(self, commit):
+        if commit:
+            self.commit()
+        else:
+            db.session.flush()
+
     def get_by_id(self, product_id):
         """Fetches a product by its ID."""
         return Product.query.get_or_404(product_id)
 
-    def list_paginated(self, page, per_page, filters):
-        """
-        Fetches a paginated, filtered, and sorted list of products.
-        'filters' is a dict containing all search/sort/filter parameters.
-        """
+    def _filtered_query(self, filters):
+        """Applies the status and search filters of the products listing."""
         query = Product.query
 
         # Status filter
@@ -38,85 +172,394 @@ class ProductRepository:
             if exact_match:
                 query = query.filter(search_column == search_value)
             else:
+                # Served by the pg_trgm GIN indexes on PostgreSQL
                 query = query.filter(search_column.ilike(f"%{search_value}%"))
+        elif search_field == 'fulltext' and search_value:
+            query = query.filter(self._fulltext_condition(search_value))
 
-        # Sorting
+        return query
+
+    def _fulltext_condition(self, search_value):
+        """Full-text match on name + description; substring match on databases without tsvector."""
+        if db.engine.dialect.name == 'postgresql':
+            return SEARCH_DOCUMENT.op('@@')(func.websearch_to_tsquery(SEARCH_CONFIG, search_value))
+        pattern = f"%{search_value}%"
+        return or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+
+    def search_ranked(self, page, per_page, filters):
+        """
+        Full-text search over name and description ('search_value' of the filters),
+        ordered by relevance (ts_rank) on PostgreSQL and by name elsewhere.
+        The status filter still applies.
+        """
+        return self._cached_page('ranked', page, per_page, filters,
+                                 lambda: self._paginate_ranked(page, per_page, filters))
+
+    def _paginate_ranked(self, page, per_page, filters):
+        query = self._filtered_query({**filters, 'search_field': 'fulltext'})
+        if db.engine.dialect.name == 'postgresql':
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, filters.get('search_value', ''))
+            query = query.order_by(func.ts_rank(SEARCH_DOCUMENT, ts_query).desc(), Product.id)
+        else:
+            query = query.order_by(Product.name, Product.id)
+        return query.paginate(page=page, per_page=per_page)
+
+    def _sort_by(self, filters):
         sort_by = filters.get('sort_by', 'name')
-        sort_order = filters.get('sort_order', 'asc')
         if sort_by not in ['sku', 'name', 'description', 'active']:
             sort_by = 'name'
+        return sort_by
+
+    def _listing_key(self, kind, page, per_page, filters, **extra):
+        """Listing cache key of a page, on the normalized filters."""
+        return {
+            'kind': kind,
+            'page': page,
+            'per_page': per_page,
+            'filters': {name: str(value) for name, value in filters.items() if value not in (None, '')},
+            **extra,
+        }
+
+    def _cached_page(self, kind, page, per_page, filters, paginate):
+        """
+        Serves a page from the listing cache, keyed on the normalized filters and
+        page; on a miss 'paginate()' runs the query and its result is stored.
+        """
+        key = self._listing_key(kind, page, per_page, filters)
+
+        def load():
+            pagination = paginate()
+            return {
+                'items': [{column: getattr(product, column) for column in LISTING_COLUMNS} for product in pagination.items],
+                'total': pagination.total,
+            }
+
+        data = listing_cache.get(key, load)
+        # Detached Product instances, rendered like the ones of a live query
+        items = [Product(**row) for row in data['items']]
+        return CachedPage(page=page, per_page=per_page, max_per_page=None, error_out=False,
+                          items=items, total=data['total'])
+
+    def invalidate_listings(self):
+        """Makes all cached listing pages stale; called after every committed product write."""
+        listing_cache.invalidate()
+
+    def listing_version(self):
+        """
+        Generation of the listing cache, bumped by every committed product write;
+        None while Redis is unavailable. It includes an epoch of the Redis data set,
+        so it never repeats after a Redis restart and can be stored durably.
+        Used to derive ETags of API responses and to tag imported files.
+        """
+        return listing_cache.generation()
+
+    def list_paginated(self, page, per_page, filters):
+        """
+        Fetches a paginated, filtered, and sorted list of products.
+        'filters' is a dict containing all search/sort/filter parameters.
+        Pages are served from the listing cache when possible.
+        """
+        return self._cached_page('list', page, per_page, filters,
+                                 lambda: self._paginate_sorted(page, per_page, filters))
+
+    def _paginate_sorted(self, page, per_page, filters):
+        return self._sorted_query(filters).paginate(page=page, per_page=per_page)
+
+    def _sorted_query(self, filters):
+        query = self._filtered_query(filters)
+
+        # Sorting
+        sort_by = self._sort_by(filters)
+        sort_order = filters.get('sort_order', 'asc')
         sort_column = getattr(Product, sort_by)
         if sort_order == 'desc':
             query = query.order_by(sort_column.desc())
         else:
             query = query.order_by(sort_column.asc())
+        return query
 
-        return query.paginate(page=page, per_page=per_page)
+    def list_fields(self, page, per_page, filters, fields):
+        """
+        Page of list_paginated as plain dicts of the requested 'fields' (names
+        from API_FIELDS); only those columns are selected. Cached like list_paginated.
+        Returns {'items': [...], 'total': n}; pages past the end are empty.
+        """
+        def load():
+            query = self._sorted_query(filters).with_entities(*[getattr(Product, field) for field in fields])
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            return {
+                'items': [dict(zip(fields, row)) for row in pagination.items],
+                'total': pagination.total,
+            }
+
+        return listing_cache.get(self._listing_key('fields', page, per_page, filters, fields=fields), load)
+
+    def get_fields(self, product_id, fields):
+        """The requested 'fields' of one product as a dict, or None if it does not exist."""
+        row = Product.query.filter(Product.id == product_id).with_entities(
+            *[getattr(Product, field) for field in fields]
+        ).first()
+        return dict(zip(fields, row)) if row is not None else None
+
+    def list_keyset(self, per_page, filters, cursor=None, exact_count=False):
+        """
+        Keyset (seek) variant of list_paginated: instead of OFFSET, each page
+        starts after the (sort key, id) encoded in 'cursor', so deep pages cost
+        the same as the first one. The total is approximate unless 'exact_count'.
+        """
+        query = self._filtered_query(filters)
+        sort_by = self._sort_by(filters)
+        descending = filters.get('sort_order', 'asc') == 'desc'
+        sort_key = KEYSET_SORT_KEYS[sort_by]
+
+        position = decode_cursor(cursor, sort_by)
+        backwards = position is not None and position['direction'] == 'prev'
+        # SKUs are unique, so they need no id tie-breaker
+        unique_key = sort_by == 'sku'
+        if position is not None:
+            # Row-value comparison matches the composite (sort key, id) indexes
+            boundary = sort_key if unique_key else tuple_(sort_key, Product.id)
+            last_seen = position['key'] if unique_key else tuple_(position['key'], position['id'])
+            query = query.filter(boundary < last_seen if descending != backwards else boundary > last_seen)
+
+        order = [sort_key] if unique_key else [sort_key, Product.id]
+        if descending != backwards:
+            query = query.order_by(*[column.desc() for column in order])
+        else:
+            query = query.order_by(*[column.asc() for column in order])
+
+        # One extra row tells whether there is another page in this direction
+        rows = query.add_columns(sort_key).limit(per_page + 1).all()
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        total, total_is_exact = self.count(filters, exact=exact_count)
+        return KeysetPage(
+            items=[product for product, _ in rows],
+            per_page=per_page,
+            next_cursor=encode_cursor(sort_by, rows[-1][1], rows[-1][0].id, 'next') if rows and (more or backwards) else None,
+            prev_cursor=encode_cursor(sort_by, rows[0][1], rows[0][0].id, 'prev') if rows and (more if backwards else position is not None) else None,
+            total=total,
+            total_is_exact=total_is_exact,
+        )
+
+    def count(self, filters, exact=False):
+        """
+        Number of products matching 'filters', as (count, is_exact).
+        On PostgreSQL the unfiltered count comes from the planner statistics
+        (pg_class.reltuples) and filtered counts are cached for a minute.
+        """
+        query = self._filtered_query(filters)
+        if exact or db.engine.dialect.name != 'postgresql':
+            return query.count(), True
+
+        unfiltered = filters.get('active_filter', 'all') not in ('active', 'inactive') and not filters.get('search_value')
+        if unfiltered:
+            estimate = db.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'product'::regclass")
+            ).scalar()
+            # reltuples is -1 (or 0) until the table was first analyzed
+            if estimate and estimate > 0:
+                return estimate, False
+
+        cache_key = tuple(sorted((k, str(v)) for k, v in filters.items() if k not in ('sort_by', 'sort_order')))
+        return count_cache.get(cache_key, query.count), False
+
+    def iter_export_rows(self, filters, batch_size=5000):
+        """
+        Yields (sku, name, description, active) for every product matching
+        'filters', in id order. Rows are streamed with a server-side cursor
+        ('yield_per'), so memory use does not grow with the catalog size.
+        """
+        return self.iter_fields(filters, ['sku', 'name', 'description', 'active'], batch_size)
+
+    def iter_fields(self, filters, fields, batch_size=5000):
+        """Like iter_export_rows, for any product columns: yields tuples in 'fields' order."""
+        query = self._filtered_query(filters).with_entities(
+            *[getattr(Product, field) for field in fields]
+        ).order_by(Product.id)
+        for row in query.yield_per(batch_size):
+            yield tuple(row)
 
-    def bulk_upsert(self, chunk):
+    def bulk_upsert(self, chunk, import_id, ordered=True, timer=None):
         """
         Performs a bulk "upsert" operation for a chunk of product data.
         Updates existing products and inserts new ones.
+        Uses COPY + UPDATE/INSERT ... ON CONFLICT on PostgreSQL and falls back to the
+        ORM path on other databases. The caller handles the commit.
+
+        'import_id' identifies the uploaded file; together with the chunk index
+        (row order in the file) it decides which duplicate row wins when chunks
+        are not applied in file order ('ordered=False', i.e. sharded imports).
+        For ordered imports rows that would not change a product are skipped.
+        Returns a dict with 'inserted', 'updated' and 'unchanged' counts.
+        The time of each stage is added to 'timer' (a metrics.StageTimer).
+        """
+        timer = timer or StageTimer()
+        with timer.stage('normalize'):
+            normalized = normalize_chunk(chunk)
+        if db.engine.dialect.name == 'postgresql':
+            return self._copy_upsert(normalized, import_id, ordered, timer)
+        return self._orm_upsert(normalized, import_id, ordered, timer)
+
+    def _copy_upsert(self, normalized, import_id, ordered, timer):
+        """
+        Streams the chunk into a temporary staging table with COPY FROM STDIN
+        and merges it into 'product' with one set-based UPDATE and one INSERT.
         """
-        # Normalize SKU data for case-insensitive comparison
-        chunk['sku_upper'] = chunk['sku'].str.upper()
-        chunk_skus = chunk['sku_upper'].tolist()
-        
+        with timer.stage('serialize'):
+            buffer = io.StringIO()
+            # The index is the row number in the file, kept for ordering
+            normalized[IMPORT_COLUMNS].to_csv(buffer, header=False, index=True)
+            buffer.seek(0)
+
+        # Raw psycopg2 cursor on the connection of the current session transaction
+        cursor = db.session.connection().connection.cursor()
+        try:
+            with timer.stage('copy'):
+                cursor.execute(CREATE_STAGING_SQL)
+                cursor.copy_expert(COPY_STAGING_SQL, buffer)
+            with timer.stage('merge'):
+                where = CHANGED_ROWS_WHERE if ordered else ROW_ORDER_WHERE
+                params = {'import_id': import_id}
+                cursor.execute(UPDATE_STAGING_SQL.format(where=where.format(new='staged')), params)
+                updated = cursor.rowcount
+                cursor.execute(INSERT_STAGING_SQL.format(where=where.format(new='EXCLUDED')), params)
+                written = [inserted for (inserted,) in cursor.fetchall()]
+                cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+        finally:
+            cursor.close()
+
+        inserted = sum(written)
+        updated += len(written) - inserted
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'unchanged': len(normalized) - inserted - updated,
+        }
+
+    def _orm_upsert(self, normalized, import_id, ordered, timer):
+        """ORM-based upsert, used for databases without COPY/ON CONFLICT support."""
         # Find existing products in the DB that match SKUs from the chunk
-        existing_products = Product.query.filter(func.upper(Product.sku).in_(chunk_skus)).all()
-        sku_to_product = {product.sku.upper(): product for product in existing_products}
-
-        products_to_add_map = {} # Use a map to handle in-chunk duplicates
-        
-        for _, row in chunk.iterrows():
-            sku_upper = row['sku_upper']
-            product = sku_to_product.get(sku_upper)
-            
-            # Prepare product data from the row
-            product_data = {
-                'name': row.get('name', ''),
-                'description': row.get('description', ''),
-                'active': True # Set as active on import/update
-            }
+        with timer.stage('lookup'):
+            chunk_skus = normalized['sku_upper'].tolist()
+            existing_products = Product.query.filter(func.upper(Product.sku).in_(chunk_skus)).all()
+            sku_to_product = {product.sku.upper(): product for product in existing_products}
 
-            if product:
-                # Update existing product
-                product.name = product_data['name']
-                product.description = product_data['description']
-                product.active = product_data['active']
-            else:
-                # Stage new product for insertion, overwriting duplicates in the same chunk
-                product_data['sku'] = row['sku'] # Use original SKU
-                products_to_add_map[sku_upper] = product_data
+        new_products = []
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        # Updates are flushed with the insert or the commit
+        with timer.stage('mutate'):
+            records = normalized[['sku', 'sku_upper', 'name', 'description']].itertuples(index=True, name=None)
+            for row_num, sku, sku_upper, name, description in records:
+                product = sku_to_product.get(sku_upper)
+                if product:
+                    if ordered:
+                        # Skip rows that would not change the product
+                        skip = (product.name, product.description, product.active) == (name, description, True)
+                    else:
+                        # Skip if a later row of the same import already wrote this product
+                        skip = product.import_id == import_id and product.import_row is not None and product.import_row > row_num
+                    if skip:
+                        counts['unchanged'] += 1
+                        continue
+                    counts['updated'] += 1
+                    # Update existing product, activating it on import
+                    product.name = name
+                    product.description = description
+                    product.active = True
+                    product.import_id = import_id
+                    product.import_row = row_num
+                else:
+                    # In-chunk duplicates were already dropped, so each SKU is new exactly once
+                    new_products.append({'sku': sku, 'name': name, 'description': description, 'active': True,
+                                         'import_id': import_id, 'import_row': row_num})
 
         # Bulk insert new products
-        if products_to_add_map:
-            db.session.bulk_insert_mappings(Product, products_to_add_map.values())
+        with timer.stage('insert'):
+            if new_products:
+                db.session.bulk_insert_mappings(Product, new_products)
+        counts['inserted'] = len(new_products)
+        return counts
 
-        # The session is committed outside, after all chunks are processed,
-        # or within the task itself. For now, we assume the caller handles the commit.
-        # This can be adjusted if each chunk should be a separate transaction.
-
-    def update(self, product, data):
+    def update(self, product, data, commit=True):
         """Updates a product with new data."""
         product.name = data.get('name', product.name)
         product.description = data.get('description', product.description)
         product.active = data.get('active', product.active)
-        db.session.commit()
+        self._finish(commit)
         return product
 
-    def delete(self, product):
+    def delete(self, product, commit=True):
         """Deletes a product."""
         db.session.delete(product)
-        db.session.commit()
+        self._finish(commit)
 
     def delete_all(self):
         """Deletes all products."""
         db.session.query(Product).delete()
         db.session.commit()
+        self.invalidate_listings()
+
+    def max_id(self):
+        """Highest product id, or None for an empty table."""
+        return db.session.query(func.max(Product.id)).scalar()
+
+    def count_up_to(self, high):
+        """Number of products with id <= high."""
+        return Product.query.filter(Product.id <= high).count()
+
+    def delete_batch(self, after_id, high, batch_size):
+        """
+        Deletes the next 'batch_size' products with after_id < id <= high, in id
+        order, and commits, so locks are held for one batch only. Sparse ids cost
+        nothing: the batch is found through the primary key, not an id range.
+        Returns (number deleted, last id of the batch), or (0, None) once none are left.
+        """
+        batch = db.session.query(Product.id).filter(
+            Product.id > after_id, Product.id <= high
+        ).order_by(Product.id).limit(batch_size).subquery()
+        last_id = db.session.query(func.max(batch.c.id)).scalar()
+        if last_id is None:
+            return 0, None
+        deleted = Product.query.filter(Product.id > after_id, Product.id <= last_id).delete(synchronize_session=False)
+        db.session.commit()
+        self.invalidate_listings()
+        return deleted, last_id
+
+    def truncate(self):
+        """
+        Empties the product table with TRUNCATE (PostgreSQL). Instant regardless
+        of table size, but takes an exclusive lock until it commits.
+        Returns the number of products removed.
+        """
+        deleted = Product.query.count()
+        db.session.execute(text("TRUNCATE TABLE product"))
+        db.session.commit()
+        self.invalidate_listings()
+        return deleted
     
-    def toggle_active(self, product):
+    def bulk_set_active(self, filters, active, commit=True):
+        """
+        Activates or deactivates every product matching 'filters' with a single
+        UPDATE. Products already in that state are not rewritten.
+        Returns the number of products changed.
+        """
+        query = self._filtered_query(filters).filter(Product.active.isnot(active))
+        changed = query.update({Product.active: active}, synchronize_session=False)
+        self._finish(commit)
+        return changed
+
+    def bulk_delete(self, filters, commit=True):
+        """Deletes every product matching 'filters' with a single DELETE. Returns the number deleted."""
+        deleted = self._filtered_query(filters).delete(synchronize_session=False)
+        self._finish(commit)
+        return deleted
+
+    def toggle_active(self, product, commit=True):
         """Toggles the active status of a product."""
         product.active = not product.active
-        db.session.commit()
+        self._finish(commit)
         return product
\ No newline at end of file
@@ -1,7 +1,22 @@
 from extensions import db
-from models import Webhook # Import Webhook model
-from sqlalchemy import or_, func
-from datetime import datetime
+from models import Webhook, WebhookDelivery # Import Webhook models
+from sqlalchemy import or_, and_, case, func, update, insert, values, column, bindparam, Integer, Float, DateTime, Boolean
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from cache import VersionedCache
+
+# Columns of one delivery outcome, as applied to the webhook row by record_deliveries()
+OUTCOME_COLUMNS = [
+    ('id', Integer),
+    ('triggered_at', DateTime),
+    ('status_code', Integer),
+    ('response_time', Float),
+    ('failed', Boolean),
+    ('open_until', DateTime),
+]
+
+# Subscribers per event type, shared by all dispatches of a process
+subscriber_cache = VersionedCache('webhook_subscribers', ttl=60)
 
 
 class WebhookRepository:
@@ -9,6 +24,7 @@ class WebhookRepository:
         webhook = Webhook(url=url, event_type=event_type, enabled=enabled)
         db.session.add(webhook)
         db.session.commit()
+        subscriber_cache.invalidate()
         return webhook
 
     def get_by_id(self, webhook_id):
@@ -21,6 +37,64 @@ class WebhookRepository:
         """Retrieves all enabled webhooks for a specific event type."""
         return Webhook.query.filter_by(enabled=True, event_type=event_type).all()
 
+    def get_subscribers(self, event_type):
+        """
+        Returns (id, url, circuit_open_until) of the enabled webhooks for an event
+        type, served from the subscriber cache. circuit_open_until may be stale,
+        but is never None for a circuit opened since it was cached: failed
+        deliveries invalidate the cache (see record_deliveries()).
+        """
+        def load():
+            rows = db.session.query(Webhook.id, Webhook.url, Webhook.circuit_open_until).filter_by(
+                enabled=True, event_type=event_type
+            )
+            return [tuple(row) for row in rows]
+        return subscriber_cache.get(('subscribers', event_type), load)
+
+    def get_open_circuits(self, webhook_ids):
+        """{webhook id: circuit_open_until} for those of 'webhook_ids' whose circuit is open now."""
+        if not webhook_ids:
+            return {}
+        rows = db.session.query(Webhook.id, Webhook.circuit_open_until).filter(
+            Webhook.id.in_(webhook_ids), Webhook.circuit_open_until > datetime.utcnow()
+        )
+        return dict(rows)
+
+    def claim_probes(self, webhook_ids, lease_seconds):
+        """
+        Claims the single trial delivery of each of 'webhook_ids' whose circuit is
+        half-open (circuit_open_until has passed): one conditional UPDATE pushes
+        circuit_open_until 'lease_seconds' ahead, so concurrent deliveries see the
+        circuit open again and stay parked until the probe closes or reopens it.
+        Returns the set of webhook ids claimed by this caller.
+        """
+        if not webhook_ids:
+            return set()
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            update(Webhook)
+            .where(Webhook.id.in_(webhook_ids), Webhook.circuit_open_until <= now)
+            .values(circuit_open_until=now + timedelta(seconds=lease_seconds))
+            .returning(Webhook.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+        return set(claimed)
+
+    def get_delivery_target(self, webhook_id):
+        """(id, url, circuit_open_until) of an enabled webhook, or None if it was deleted or disabled."""
+        row = db.session.query(Webhook.id, Webhook.url, Webhook.circuit_open_until).filter_by(
+            id=webhook_id, enabled=True
+        ).first()
+        return tuple(row) if row else None
+
+    def get_event_types(self):
+        """Distinct event types of the enabled webhooks, without loading the rows."""
+        def load():
+            rows = db.session.query(Webhook.event_type).filter_by(enabled=True).distinct().order_by(Webhook.event_type)
+            return [event_type for (event_type,) in rows]
+        return subscriber_cache.get(('event_types',), load)
+
     def list_paginated(self, page, per_page, filters):
         query = Webhook.query
 
@@ -47,20 +121,89 @@ class WebhookRepository:
         webhook.event_type = data.get('event_type', webhook.event_type)
         webhook.enabled = data.get('enabled', webhook.enabled)
         db.session.commit()
+        subscriber_cache.invalidate()
         return webhook
 
     def delete(self, webhook):
         db.session.delete(webhook)
         db.session.commit()
+        subscriber_cache.invalidate()
 
     def toggle_enabled(self, webhook):
         webhook.enabled = not webhook.enabled
         db.session.commit()
+        subscriber_cache.invalidate()
         return webhook
 
-    def update_last_trigger_status(self, webhook, status_code, response_time):
-        webhook.last_triggered = datetime.utcnow()
-        webhook.last_status_code = status_code
-        webhook.last_response_time = response_time
+    def record_deliveries(self, event_type, results, breaker_threshold=5, breaker_cooldown=300):
+        """
+        Persists the outcomes of one dispatch batch in a single transaction:
+        one UPDATE ... FROM (VALUES ...) for the last_* and circuit breaker
+        columns of all webhooks (an executemany UPDATE by id on databases
+        without UPDATE ... FROM VALUES, e.g. SQLite) and one multi-row INSERT
+        into the delivery log.
+        'results' are the dicts returned by WebhookDispatcher.dispatch().
+
+        A failed delivery increments consecutive_failures; reaching
+        'breaker_threshold' opens the circuit for 'breaker_cooldown' seconds
+        (a failed half-open probe is past the threshold, so it reopens it).
+        A successful one closes it again. A failure may open a circuit, so it
+        also invalidates the cached subscribers and their circuit state.
+        """
+        from webhook_dispatcher import is_delivery_failure # lazy import: keeps requests out of the web process
+
+        if not results:
+            return
+        outcomes = [
+            (r['webhook_id'], r['triggered_at'], r['status_code'], r['response_time'],
+             is_delivery_failure(r['status_code']), r['triggered_at'] + timedelta(seconds=breaker_cooldown))
+            for r in results
+        ]
+        if db.engine.dialect.name == 'postgresql':
+            batch = values(*[column(name, type_) for name, type_ in OUTCOME_COLUMNS], name='batch').data(outcomes)
+            db.session.execute(self._outcome_update(batch.c, breaker_threshold))
+        else:
+            params = {name: bindparam(f'b_{name}', type_=type_) for name, type_ in OUTCOME_COLUMNS}
+            db.session.execute(
+                self._outcome_update(SimpleNamespace(**params), breaker_threshold),
+                [{f'b_{name}': value for (name, _), value in zip(OUTCOME_COLUMNS, outcome)} for outcome in outcomes]
+            )
+        db.session.execute(insert(WebhookDelivery), [
+            {
+                'webhook_id': r['webhook_id'],
+                'event_type': event_type,
+                'status_code': r['status_code'],
+                'response_time': r['response_time'],
+                'triggered_at': r['triggered_at'],
+            }
+            for r in results
+        ])
+        db.session.commit()
+        if any(outcome[4] for outcome in outcomes):
+            subscriber_cache.invalidate()
+
+    def _outcome_update(self, outcome, breaker_threshold):
+        """UPDATE of the webhook table applying one delivery outcome; 'outcome' holds the OUTCOME_COLUMNS."""
+        webhooks = Webhook.__table__
+        return (
+            update(webhooks)
+            .where(webhooks.c.id == outcome.id)
+            .values(
+                last_triggered=outcome.triggered_at,
+                last_status_code=outcome.status_code,
+                last_response_time=outcome.response_time,
+                consecutive_failures=case((outcome.failed, webhooks.c.consecutive_failures + 1), else_=0),
+                circuit_open_until=case(
+                    (and_(outcome.failed, webhooks.c.consecutive_failures + 1 >= breaker_threshold), outcome.open_until),
+                    (outcome.failed, webhooks.c.circuit_open_until),
+                    else_=None,
+                ),
+            )
+        )
+
+    def purge_deliveries(self, retention_days):
+        """Deletes delivery log entries older than 'retention_days'. Returns the number deleted."""
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = WebhookDelivery.query.filter(WebhookDelivery.triggered_at < cutoff).delete(synchronize_session=False)
         db.session.commit()
-        return webhook
\ No newline at end of file
+        return deleted
@@ -0,0 +1,12 @@
+"""
+Names of the Celery tasks queued by the web app.
+
+The web process sends tasks by name (celery.send_task), so it never imports
+tasks.py and with it pandas/NumPy and requests; only workers load the task code.
+Routing by name still applies (task_routes in extensions.make_celery).
+"""
+IMPORT_PRODUCTS = "tasks.import_products_task"
+IMPORT_PRODUCTS_RESUMABLE = "tasks.import_products_resumable_task"
+BULK_PRODUCTS = "tasks.bulk_products_task"
+DELETE_ALL_PRODUCTS = "tasks.delete_all_products_task"
+TEST_WEBHOOK = "tasks.test_webhook_task"
@@ -1,67 +1,224 @@
-import pandas as pd
-import math
-import requests
+import os
+import random
 import time
-from celery import shared_task
+from datetime import datetime
+from celery import shared_task, chord, group
+from celery.exceptions import Ignore
 from repositories.product_repository import ProductRepository
 from repositories.webhook_repository import WebhookRepository
-from extensions import db
+from repositories.import_checkpoint_repository import ImportCheckpointRepository
+from repositories.imported_file_repository import ImportedFileRepository
+from repositories.outbox_repository import OutboxRepository
+from extensions import db, get_redis
+from flask import current_app
+from webhook_dispatcher import get_dispatcher, is_delivery_failure, retry_delay
+from event_buffer import buffer_event, claim_flush, drain_events, coalesce
+from csv_reader import read_csv_header, iter_csv_chunks, compute_shards, get_progress, is_compressed, SHARD_ROW_BITS
+from progress import ProgressReporter, publish_progress
+from metrics import StageTimer, record_import_chunk, record_import, record_webhook_deliveries
+from bulk_actions import apply_bulk_action
 
-def get_total_rows(filepath):
-    """Helper function to get total number of rows in a file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        # The -1 is to account for the header row
-        return sum(1 for row in f) -1
+CHUNK_SIZE = 1000
+# Products deleted per transaction by delete_all_products_task
+DELETE_BATCH_SIZE = 10000
+# Outbox events relayed per transaction by relay_outbox_task
+OUTBOX_BATCH_SIZE = 500
 
-@shared_task(bind=True, ignore_result=False)
-def import_products_task(self, filepath):
+# Redis counter of deliveries of a late-acknowledged import task
+DELIVERY_KEY = "import:deliveries:{task_id}"
+
+class DeliveryLimitExceeded(Exception):
+    pass
+
+def check_delivery_limit(client, task_id, limit):
+    """
+    Counts deliveries of a late-acknowledged task (redelivered after a worker
+    crash or the broker's visibility timeout) and raises once it was delivered
+    more than 'limit' times, e.g. for a file that keeps crashing the worker.
+    """
+    key = DELIVERY_KEY.format(task_id=task_id)
+    pipe = client.pipeline()
+    pipe.incr(key)
+    pipe.expire(key, 7 * 24 * 3600)
+    deliveries = pipe.execute()[0]
+    if deliveries > limit:
+        raise DeliveryLimitExceeded(f"Delivered {deliveries} times, the worker was lost on every attempt; giving up.")
+
+def get_import_id(filepath):
+    """Stable id of an upload (the generated file name), shared by all its shards and retries."""
+    return os.path.basename(filepath).split('.', 1)[0]
+
+def add_counts(totals, counts):
+    """Adds inserted/updated/unchanged counts of a chunk (or shard) to the running totals."""
+    for key in ('inserted', 'updated', 'unchanged'):
+        totals[key] += counts[key]
+    return totals
+
+def format_summary(counts):
+    return f"{counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged"
+
+def build_sharded_import(filepath, columns, shard_count, parent_task_id, sha256=None, started_at=None):
+    """
+    Builds a chord of shard tasks over line-aligned byte ranges of the file,
+    with finalize_import_task as the callback. Returns None if the file is
+    too small to be split.
+    """
+    shards = compute_shards(filepath, shard_count)
+    if len(shards) < 2:
+        return None
+    shard_tasks = group(
+        import_shard_task.s(filepath, columns, index, shards, parent_task_id)
+        for index in range(len(shards))
+    )
+    return chord(shard_tasks, finalize_import_task.s(filepath, sha256, parent_task_id, started_at))
+
+def run_import(task, filepath, resumable=False, upload_info=None):
     """
-    Background task to import products from a CSV file.
+    Imports products from a CSV file (optionally .gz/.zst) on behalf of 'task'.
     Delegates the database logic to the ProductRepository.
+
+    'upload_info' carries what /upload learned while spooling the file
+    (sha256, size, rows, columns), so the header and row count are not
+    rediscovered here. A file whose content hash was already imported
+    completes immediately without touching the product table.
+
+    With 'resumable' each chunk is committed on its own together with a
+    checkpoint for the file, and a retried or re-dispatched task resumes after
+    the last committed chunk.
     """
     from app import app # lazy import
     
     product_repo = ProductRepository()
-    CHUNK_SIZE = 1000
+    checkpoint_repo = ImportCheckpointRepository()
+    imported_file_repo = ImportedFileRepository()
+    import_id = get_import_id(filepath)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    reporter = None
+    started_at = time.time()
+    # Per-stage seconds of the current chunk (drained into 'totals' after each chunk)
+    timer = StageTimer()
+    totals = StageTimer()
+    bytes_read = 0
     
     try:
-        total_rows = get_total_rows(filepath)
+        upload_info = upload_info or {}
+        # Single pass over the file: progress is measured in bytes consumed
+        file_size = os.path.getsize(filepath)
+        columns = upload_info.get('columns') or read_csv_header(filepath)
+        total_rows = upload_info.get('rows')
         processed_rows = 0
-        self.update_state(state='PROGRESS', meta={'status': 'Starting import...', 'progress': 0})
         
         with app.app_context():
-            # Process file in chunks
-            for chunk in pd.read_csv(filepath, chunksize=CHUNK_SIZE, keep_default_na=False):
-                # Normalize column names
-                chunk.columns = [col.lower().strip() for col in chunk.columns]
-                
-                # Ensure required columns exist
-                if 'sku' not in chunk.columns:
-                    raise KeyError("CSV must contain a 'sku' column.")
+            # Progress goes to the result backend and to the SSE stream, at most every 250ms
+            reporter = ProgressReporter(task, get_redis())
+            reporter.report({'status': 'Starting import...', 'progress': 0})
+            if resumable:
+                check_delivery_limit(reporter.client, task.request.id, app.config.get('IMPORT_MAX_DELIVERIES', 3))
+
+            sha256 = upload_info.get('sha256')
+            # Skipped only while the catalog is unchanged since that import, unless forced
+            previous_import = None
+            if not upload_info.get('force'):
+                previous_import = imported_file_repo.get_applied(sha256, product_repo.listing_version())
+            if previous_import is not None:
+                result = {'status': f'Already imported on {previous_import.imported_at:%Y-%m-%d %H:%M} UTC, nothing to do.',
+                          'progress': 100, 'already_imported': True}
+                record_import(reporter.client, 'skipped', time.time() - started_at)
+                reporter.finish('SUCCESS', result)
+                return result
 
+            # Large files are split into shards imported in parallel by several workers
+            shard_count = app.config.get('IMPORT_SHARDS', 1)
+            # Compressed streams cannot be split by byte range, and line-aligned shards could
+            # start inside a multiline quoted field: only files known to be one record per line are split
+            single_line = upload_info.get('multiline') is False
+            if (shard_count > 1 and single_line and not is_compressed(filepath)
+                    and file_size >= app.config.get('IMPORT_SHARD_MIN_BYTES', 0)):
+                workflow = build_sharded_import(filepath, columns, shard_count, task.request.id, sha256, started_at)
+                if workflow is not None:
+                    reporter.report({'status': f'Importing in {shard_count} shards...', 'progress': 0})
+                    # The chord callback inherits this task's id and reports the final result
+                    return task.replace(workflow)
+
+            checkpoint = None
+            start_offset = None
+            resumed_from = None
+            if resumable:
+                checkpoint = checkpoint_repo.start(filepath, task.request.id)
+                if checkpoint.rows_done:
+                    start_offset = checkpoint.byte_offset
+                    processed_rows = resumed_from = checkpoint.rows_done
+
+            # Process file in chunks. The header was validated once above;
+            # chunks reuse the normalized column names.
+            reader = iter_csv_chunks(filepath, columns, CHUNK_SIZE,
+                                     start_offset=start_offset, first_row=processed_rows)
+            last_position = start_offset or 0
+            for chunk, end_offset, position in timer.iter('parse', reader):
                 # Delegate the database work to the repository
-                product_repo.bulk_upsert(chunk)
-                
-                # Update progress
+                add_counts(counts, product_repo.bulk_upsert(chunk, import_id, timer=timer))
                 processed_rows += len(chunk)
-                progress = math.ceil((processed_rows / total_rows) * 100) if total_rows > 0 else 100
-                self.update_state(state='PROGRESS', meta={'status': f'Processing... {processed_rows}/{total_rows} rows', 'progress': progress})
+
+                if checkpoint is not None:
+                    # The chunk and its checkpoint become durable together
+                    with timer.stage('commit'):
+                        checkpoint_repo.advance(checkpoint, end_offset, processed_rows)
+                        db.session.commit()
+                    product_repo.invalidate_listings()
+
+                # Stage timings and row/byte counters of this chunk
+                chunk_bytes = max(position - last_position, 0)
+                last_position = position
+                bytes_read += chunk_bytes
+                record_import_chunk(reporter.client, timer.seconds, len(chunk), chunk_bytes)
+                totals.merge(timer.take())
+                
+                # Update progress (rate-limited)
+                if not reporter.due():
+                    continue
+                progress = get_progress(position, 0, file_size)
+                if total_rows:
+                    status = f'Processing... {processed_rows}/{total_rows} rows ({progress}%)'
+                else:
+                    status = f'Processing... {processed_rows} rows ({progress}%)'
+                meta = {'status': status, 'progress': progress}
+                if resumed_from is not None:
+                    meta['status'] = f'Resumed from row {resumed_from}. {status}'
+                    meta['resumed_from'] = resumed_from
+                reporter.report(meta)
 
             # Commit the transaction after all chunks are processed
-            db.session.commit()
+            with timer.stage('commit'):
+                db.session.commit()
+            product_repo.invalidate_listings()
+            record_import_chunk(reporter.client, timer.seconds, 0, 0)
+            totals.merge(timer.take())
+            record_import(reporter.client, 'success', time.time() - started_at)
+            if checkpoint is not None:
+                checkpoint_repo.complete(checkpoint)
+            if sha256:
+                imported_file_repo.record(sha256, filepath, processed_rows, counts,
+                                          catalog_version=product_repo.listing_version())
 
             # Dispatch webhook for csv_import_complete event
             payload = {
                 "event": "csv_import_complete",
                 "message": "CSV import finished successfully.",
                 "total_rows_processed": processed_rows,
+                **counts,
                 "filepath": filepath # Or just the filename
             }
             send_webhook_event_task.delay('csv_import_complete', payload)
 
+    except Ignore:
+        # Raised by task.replace() once the import was handed over to shard tasks
+        raise
     except (FileNotFoundError, KeyError) as e:
         db.session.rollback()
-        self.update_state(state='FAILURE', meta={'status': f'Error: {e}'})
+        task.update_state(state='FAILURE', meta={'status': f'Error: {e}'})
+        if reporter is not None:
+            record_import(reporter.client, 'failure', time.time() - started_at)
+            reporter.finish('FAILURE', {'status': f'Error: {e}'})
         # Dispatch webhook for csv_import_failed event (optional, but good practice)
         send_webhook_event_task.delay('csv_import_failed', {
             "event": "csv_import_failed",
@@ -71,7 +228,10 @@ def import_products_task(self, filepath):
         raise
     except Exception as e:
         db.session.rollback()
-        self.update_state(state='FAILURE', meta={'status': f'An unexpected error occurred: {e}'})
+        task.update_state(state='FAILURE', meta={'status': f'An unexpected error occurred: {e}'})
+        if reporter is not None:
+            record_import(reporter.client, 'failure', time.time() - started_at)
+            reporter.finish('FAILURE', {'status': f'An unexpected error occurred: {e}'})
         # Dispatch webhook for csv_import_failed event
         send_webhook_event_task.delay('csv_import_failed', {
             "event": "csv_import_failed",
@@ -80,41 +240,361 @@ def import_products_task(self, filepath):
         })
         raise
 
-    return {'status': 'Import complete!', 'progress': 100}
+    result = {'status': f'Import complete! {format_summary(counts)}.', 'progress': 100, **counts,
+              'rows': processed_rows, 'bytes': bytes_read, 'timings': totals.as_dict()}
+    reporter.finish('SUCCESS', result)
+    return result
+
+
+@shared_task(bind=True, ignore_result=False)
+def import_products_task(self, filepath, resumable=False, upload_info=None):
+    """
+    Background import of an upload (see run_import). The message is
+    acknowledged on receipt, so a worker crash fails the import instead of
+    running it a second time.
+    """
+    return run_import(self, filepath, resumable, upload_info)
+
+@shared_task(bind=True, ignore_result=False, acks_late=True, reject_on_worker_lost=True)
+def import_products_resumable_task(self, filepath, upload_info=None):
+    """
+    Resumable import (IMPORT_RESUMABLE): acknowledged only once finished, so
+    after a worker crash the message is redelivered and the import resumes
+    from its checkpoint, at most IMPORT_MAX_DELIVERIES times.
+    """
+    return run_import(self, filepath, True, upload_info)
+
+
+@shared_task(bind=True, ignore_result=False, acks_late=True, reject_on_worker_lost=True)
+def import_shard_task(self, filepath, columns, shard, shards, parent_task_id):
+    """
+    Imports one byte range ('shards[shard]') of a sharded upload. Each chunk is
+    committed with the shard's checkpoint, so a redelivered shard resumes where
+    it stopped. Progress over all shards is reported on the parent import task.
+    """
+    from app import app # lazy import
+
+    product_repo = ProductRepository()
+    checkpoint_repo = ImportCheckpointRepository()
+    import_id = get_import_id(filepath)
+    start_offset, end_offset = shards[shard]
+    shard_bytes = sum(end - start for start, end in shards)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    timer = StageTimer()
+    totals = StageTimer()
+    bytes_read = 0
+
+    try:
+        with app.app_context():
+            # Shards report on the parent import task, each at most every 250ms
+            reporter = ProgressReporter(self, get_redis(), task_id=parent_task_id)
+            check_delivery_limit(reporter.client, self.request.id, app.config.get('IMPORT_MAX_DELIVERIES', 3))
+            checkpoint = checkpoint_repo.start(filepath, self.request.id, shard=shard)
+            rows_done = checkpoint.rows_done
+            if rows_done:
+                start_offset = checkpoint.byte_offset
+
+            # Row keys are offset by the shard index so later shards win over earlier ones
+            reader = iter_csv_chunks(filepath, columns, CHUNK_SIZE, start_offset=start_offset,
+                                     end_offset=end_offset, first_row=(shard << SHARD_ROW_BITS) + rows_done)
+            last_offset = start_offset
+            for chunk, offset, _ in timer.iter('parse', reader):
+                # Shards run in any order, so rows are applied with row-order checks
+                add_counts(counts, product_repo.bulk_upsert(chunk, import_id, ordered=False, timer=timer))
+                rows_done += len(chunk)
+                with timer.stage('commit'):
+                    checkpoint_repo.advance(checkpoint, offset, rows_done)
+                    db.session.commit()
+                product_repo.invalidate_listings()
+
+                chunk_bytes = max(offset - last_offset, 0)
+                last_offset = offset
+                bytes_read += chunk_bytes
+                record_import_chunk(reporter.client, timer.seconds, len(chunk), chunk_bytes)
+                totals.merge(timer.take())
+                if not reporter.due():
+                    continue
+
+                # Bytes consumed by all shards so far, from their committed checkpoints
+                offsets = checkpoint_repo.byte_offsets(filepath)
+                consumed = sum(max(offsets.get(index, start), start) - start for index, (start, end) in enumerate(shards))
+                processed_rows = checkpoint_repo.total_rows_done(filepath)
+                progress = get_progress(consumed, 0, shard_bytes)
+                reporter.report({'status': f'Processing... {processed_rows} rows ({progress}%)', 'progress': progress})
+
+            checkpoint_repo.complete(checkpoint)
+    except Exception as e:
+        db.session.rollback()
+        send_webhook_event_task.delay('csv_import_failed', {
+            "event": "csv_import_failed",
+            "message": f"CSV import failed in shard {shard}: {e}",
+            "filepath": filepath
+        })
+        raise
+
+    totals.merge(timer.take())
+    return {'shard': shard, 'rows': rows_done, **counts, 'bytes': bytes_read, 'timings': totals.as_dict()}
+
+
+@shared_task(ignore_result=False)
+def finalize_import_task(shard_results, filepath, sha256=None, parent_task_id=None, started_at=None):
+    """
+    Chord callback of a sharded import: aggregates the shard counts and fires
+    the csv_import_complete webhook once for the whole file.
+    """
+    from app import app # lazy import
+
+    processed_rows = sum(result['rows'] for result in shard_results)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    totals = StageTimer()
+    for result in shard_results:
+        add_counts(counts, result)
+        totals.merge(result.get('timings', {}))
+    if sha256:
+        with app.app_context():
+            ImportedFileRepository().record(sha256, filepath, processed_rows, counts,
+                                            catalog_version=ProductRepository().listing_version())
+
+    payload = {
+        "event": "csv_import_complete",
+        "message": "CSV import finished successfully.",
+        "total_rows_processed": processed_rows,
+        **counts,
+        "filepath": filepath
+    }
+    send_webhook_event_task.delay('csv_import_complete', payload)
+    # Stage timings are summed over shards, i.e. worker time rather than wall-clock time
+    result = {'status': f'Import complete! {format_summary(counts)}.', 'progress': 100, **counts,
+              'rows': processed_rows, 'bytes': sum(shard_result.get('bytes', 0) for shard_result in shard_results),
+              'timings': totals.as_dict()}
+    with app.app_context():
+        if started_at:
+            record_import(get_redis(), 'success', time.time() - started_at)
+        if parent_task_id:
+            publish_progress(get_redis(), parent_task_id, 'SUCCESS', result)
+    return result
 
 
+@shared_task(ignore_result=False)
+def bulk_products_task(action, filters):
+    """Background variant of apply_bulk_action for filters that match many products."""
+    from app import app # lazy import
+
+    with app.app_context():
+        affected = apply_bulk_action(action, filters)
+    return {'status': f'Bulk {action} complete: {affected} products affected.', 'progress': 100, 'affected': affected}
+
+@shared_task(bind=True, ignore_result=False)
+def delete_all_products_task(self):
+    """
+    Background task deleting all products, in keyset batches of DELETE_BATCH_SIZE
+    ids with a commit per batch (or with one TRUNCATE when PRODUCTS_DELETE_ALL_TRUNCATE is set on
+    PostgreSQL). Progress is reported like an import's, via /status/<task_id>.
+    Products created after the task started are kept.
+    """
+    from app import app # lazy import
+    product_repo = ProductRepository()
+
+    with app.app_context():
+        # Re-uploading a previously imported file must restore the catalog
+        ImportedFileRepository().clear()
+        if app.config.get('PRODUCTS_DELETE_ALL_TRUNCATE') and db.engine.dialect.name == 'postgresql':
+            deleted = product_repo.truncate()
+        else:
+            deleted = 0
+            reporter = ProgressReporter(self, get_redis())
+            high = product_repo.max_id()
+            if high is not None:
+                total = product_repo.count_up_to(high)
+                last_id = 0
+                while True:
+                    batch_deleted, last_id = product_repo.delete_batch(last_id, high, DELETE_BATCH_SIZE)
+                    if last_id is None:
+                        break
+                    deleted += batch_deleted
+                    if reporter.due():
+                        progress = get_progress(deleted, 0, total)
+                        reporter.report({
+                            'status': f'Deleting... {deleted} products deleted ({progress}%)',
+                            'progress': progress
+                        })
+
+        # Dispatch webhook for bulk_products_deleted event
+        payload = {
+            "event": "bulk_products_deleted",
+            "message": "All products in the database have been deleted.",
+            "deleted_count": deleted
+        }
+        send_webhook_event_task.delay('bulk_products_deleted', payload)
+
+    return {'status': f'All products deleted ({deleted} products).', 'progress': 100, 'deleted_count': deleted}
+
+def publish_webhook_event(event_type, payload):
+    """
+    Publishes a product change event to its webhook subscribers.
+    By default each event is its own send_webhook_event_task. With
+    WEBHOOK_BATCH_WINDOW set, events are buffered in Redis per event type and
+    flushed as one batched payload after the window or WEBHOOK_BATCH_MAX_EVENTS.
+    """
+    window = current_app.config.get('WEBHOOK_BATCH_WINDOW', 0)
+    if not window:
+        send_webhook_event_task.delay(event_type, payload)
+        return
+
+    client = get_redis()
+    buffered = buffer_event(client, event_type, payload)
+    if buffered >= current_app.config.get('WEBHOOK_BATCH_MAX_EVENTS', 100):
+        flush_webhook_batch_task.delay(event_type)
+    elif claim_flush(client, event_type, window):
+        flush_webhook_batch_task.apply_async((event_type,), countdown=window)
+
+@shared_task(ignore_result=True)
+def relay_outbox_task():
+    """
+    Periodic relay of the transactional outbox: publishes pending product
+    change events in id order, in batches, deleting each batch in the same
+    transaction. A batch whose publishing fails is retried on the next run,
+    so delivery is at-least-once.
+    """
+    from app import app # lazy import
+    outbox_repo = OutboxRepository()
+
+    with app.app_context():
+        while True:
+            try:
+                events = outbox_repo.claim_batch(OUTBOX_BATCH_SIZE)
+                for event in events:
+                    publish_webhook_event(event.event_type, event.payload)
+                outbox_repo.delete(events)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            if len(events) < OUTBOX_BATCH_SIZE:
+                break
+
+@shared_task(ignore_result=True)
+def flush_webhook_batch_task(event_type):
+    """
+    Delivers the buffered events of one type as a single array payload per
+    subscriber, collapsed per product_id to the latest state.
+    """
+    from app import app # lazy import
+
+    with app.app_context():
+        events = coalesce(drain_events(get_redis(), event_type))
+    if not events:
+        return # Already flushed by an earlier (size-triggered) flush
+    payload = {
+        "event": event_type,
+        "batch": True,
+        "count": len(events),
+        "events": events
+    }
+    send_webhook_event_task(event_type, payload)
+
+def breaker_settings(config):
+    """record_deliveries() keyword arguments for the circuit breaker settings."""
+    return {
+        'breaker_threshold': config.get('WEBHOOK_BREAKER_THRESHOLD', 5),
+        'breaker_cooldown': config.get('WEBHOOK_BREAKER_COOLDOWN', 300),
+    }
+
+def probe_lease(config):
+    """
+    Seconds a half-open circuit stays claimed by its probe delivery: longer than
+    the delivery can take, so the lease only runs out if the probing worker died.
+    """
+    return config.get('WEBHOOK_CONNECT_TIMEOUT', 3.0) + config.get('WEBHOOK_TIMEOUT', 10.0) + 30
+
+def schedule_webhook_retry(config, webhook_id, event_type, payload, attempt, not_before=None):
+    """
+    Parks a delivery in the retry queue: a retry_webhook_delivery_task with an
+    exponential backoff countdown (with jitter), and no earlier than
+    'not_before' (the end of an open circuit). Returns False once the
+    attempts are exhausted and the delivery is dropped.
+    """
+    if attempt > config.get('WEBHOOK_RETRY_MAX_ATTEMPTS', 8):
+        print(f"Dropping {event_type} delivery to webhook {webhook_id} after {attempt - 1} attempts")
+        return False
+    countdown = retry_delay(attempt, config.get('WEBHOOK_RETRY_BASE_DELAY', 10), config.get('WEBHOOK_RETRY_MAX_DELAY', 3600))
+    if not_before is not None:
+        # Spread the parked retries over the first seconds of the half-open circuit
+        countdown = max(countdown, (not_before - datetime.utcnow()).total_seconds() + random.uniform(0, 10))
+    retry_webhook_delivery_task.apply_async((webhook_id, event_type, payload, attempt), countdown=countdown)
+    return True
+
 @shared_task(ignore_result=True)
 def send_webhook_event_task(event_type, payload):
     """
     Background task to send webhooks for a specific event type.
+    All matching webhooks are delivered concurrently by the WebhookDispatcher.
+    Webhooks with an open circuit are skipped and the event is parked for
+    them; failed deliveries are parked as well (see schedule_webhook_retry).
+    A half-open circuit lets exactly one delivery through as a probe.
     """
     from app import app # lazy import
     webhook_repo = WebhookRepository()
     
     with app.app_context():
-        # Get all enabled webhooks for this event type
-        webhooks = webhook_repo.get_all_enabled_for_event(event_type)
-        
-        for webhook in webhooks:
-            status_code = None
-            response_time = None
-            try:
-                start_time = time.monotonic()
-                response = requests.post(
-                    webhook.url, 
-                    json=payload,
-                    timeout=10 # Longer timeout for actual events
-                )
-                end_time = time.monotonic()
-                status_code = response.status_code
-                response_time = (end_time - start_time) * 1000 # in milliseconds
-
-            except requests.exceptions.RequestException as e:
-                status_code = 0 # Indicate a connection/request error
-                response_time = 0.0
-                print(f"Webhook send failed for {webhook.url} (Event: {event_type}): {e}")
-            finally:
-                webhook_repo.update_last_trigger_status(webhook, status_code, response_time)
+        # Get all enabled webhooks for this event type (cached per process)
+        subscribers = webhook_repo.get_subscribers(event_type)
+        if not subscribers:
+            return
+
+        # Only webhooks whose circuit was opened need the breaker queries; while
+        # every circuit is closed (the common case) a dispatch costs none
+        tripped_ids = [webhook_id for webhook_id, _, open_until in subscribers if open_until is not None]
+        probes, open_circuits = set(), {}
+        if tripped_ids:
+            # Claimed probes show up as open circuits too, but are delivered
+            probes = webhook_repo.claim_probes(tripped_ids, probe_lease(app.config))
+            open_circuits = webhook_repo.get_open_circuits(tripped_ids)
+        for webhook_id, open_until in open_circuits.items():
+            if webhook_id not in probes:
+                schedule_webhook_retry(app.config, webhook_id, event_type, payload, 1, not_before=open_until)
+        targets = [(webhook_id, url) for webhook_id, url, _ in subscribers
+                   if webhook_id in probes or webhook_id not in open_circuits]
+        if not targets:
+            return
+
+        dispatcher = get_dispatcher(app.config)
+        results = dispatcher.dispatch(targets, payload)
+        # One bulk write per dispatch batch instead of a commit per delivery
+        webhook_repo.record_deliveries(event_type, results, **breaker_settings(app.config))
+        record_webhook_deliveries(get_redis(), event_type, results)
+        for result in results:
+            if is_delivery_failure(result['status_code']):
+                schedule_webhook_retry(app.config, result['webhook_id'], event_type, payload, 1)
+
+@shared_task(ignore_result=True)
+def retry_webhook_delivery_task(webhook_id, event_type, payload, attempt):
+    """
+    Redelivers a parked event to one webhook. While the webhook's circuit is
+    still open the retry is postponed; a failed retry is rescheduled with a
+    longer backoff until WEBHOOK_RETRY_MAX_ATTEMPTS.
+    """
+    from app import app # lazy import
+    webhook_repo = WebhookRepository()
+
+    with app.app_context():
+        target = webhook_repo.get_delivery_target(webhook_id)
+        if target is None:
+            return # Deleted or disabled meanwhile
+        webhook_id, url, open_until = target
+        # A tripped circuit is only passed by the one delivery that claims its half-open probe;
+        # the others wait for the probe to close or reopen it
+        if open_until is not None and not webhook_repo.claim_probes([webhook_id], probe_lease(app.config)):
+            open_until = webhook_repo.get_open_circuits([webhook_id]).get(webhook_id)
+            schedule_webhook_retry(app.config, webhook_id, event_type, payload, attempt + 1, not_before=open_until)
+            return
+
+        # Closed circuit, or the probe of a half-open one: the outcome closes or reopens it
+        result, = get_dispatcher(app.config).dispatch([(webhook_id, url)], payload)
+        webhook_repo.record_deliveries(event_type, [result], **breaker_settings(app.config))
+        record_webhook_deliveries(get_redis(), event_type, [result])
+        if is_delivery_failure(result['status_code']):
+            schedule_webhook_retry(app.config, webhook_id, event_type, payload, attempt + 1)
 
 @shared_task(ignore_result=True)
 def test_webhook_task(webhook_id):
@@ -128,24 +608,22 @@ def test_webhook_task(webhook_id):
     with app.app_context():
         webhook = webhook_repo.get_by_id(webhook_id)
         if webhook and webhook.enabled:
-            status_code = None
-            response_time = None
-            try:
-                start_time = time.monotonic()
-                response = requests.post(
-                    webhook.url, 
-                    json={"test_event": webhook.event_type, "timestamp": time.time()},
-                    timeout=5 # Timeout after 5 seconds
-                )
-                end_time = time.monotonic()
-                status_code = response.status_code
-                response_time = (end_time - start_time) * 1000 # in milliseconds
-
-            except requests.exceptions.RequestException as e:
-                # Handle connection errors, timeouts, etc.
-                status_code = 0 # Indicate a connection error
-                response_time = 0.0
-                print(f"Webhook test failed for {webhook.url}: {e}")
-            finally:
-                # Update webhook status in DB
-                webhook_repo.update_last_trigger_status(webhook, status_code, response_time)
\ No newline at end of file
+            dispatcher = get_dispatcher(app.config)
+            payload = {"test_event": webhook.event_type, "timestamp": time.time()}
+            # Shorter timeout for interactive tests
+            result, = dispatcher.dispatch([(webhook.id, webhook.url)], payload,
+                                          timeout=app.config.get('WEBHOOK_TEST_TIMEOUT', 5.0))
+            # Update webhook status in DB
+            webhook_repo.record_deliveries('webhook_test', [result], **breaker_settings(app.config))
+
+@shared_task(ignore_result=True)
+def purge_webhook_deliveries_task():
+    """
+    Periodic task (see beat_schedule in extensions.make_celery) that keeps the
+    webhook delivery log bounded to WEBHOOK_DELIVERY_RETENTION_DAYS.
+    """
+    from app import app # lazy import
+
+    with app.app_context():
+        deleted = WebhookRepository().purge_deliveries(app.config.get('WEBHOOK_DELIVERY_RETENTION_DAYS', 30))
+        print(f"Purged {deleted} webhook deliveries.")
@@ -0,0 +1,99 @@
+import csv
+import hashlib
+import os
+import uuid
+from flask import Request, current_app
+from csv_records import RecordScanner
+
+# Compressed uploads keep their suffix so the worker can decompress them on the fly
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+# Largest header line sniffed while spooling an upload
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class UploadSpool:
+    """
+    Write target for an uploaded file: the multipart parser streams the request
+    body straight into 'filepath' in fixed-size blocks, while the spool hashes
+    the content, counts CSV records and sniffs the header in the same pass.
+    """
+
+    def __init__(self, filepath, compressed=False):
+        self.filepath = filepath
+        self.compressed = compressed
+        self.size = 0
+        self._file = open(filepath, 'wb')
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self._scanner = RecordScanner()
+
+    def write(self, block):
+        self._file.write(block)
+        self._hash.update(block)
+        self.size += len(block)
+        if not self.compressed and block:
+            self._scanner.feed(block)
+            if len(self._head) < MAX_HEADER_BYTES and b'\n' not in self._head:
+                self._head += block[:MAX_HEADER_BYTES]
+        return len(block)
+
+    # The multipart parser rewinds the stream once a part is complete
+    def seek(self, offset, whence=0):
+        self._file.flush()
+        return self._file.tell()
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    @property
+    def columns(self):
+        """Normalized header columns, or None if they could not be sniffed."""
+        if self.compressed or b'\n' not in self._head:
+            return None
+        line = self._head.split(b'\n', 1)[0].decode('utf-8-sig', errors='replace')
+        return [col.lower().strip() for col in next(csv.reader([line]), [])]
+
+    @property
+    def rows(self):
+        """Number of data rows (excluding the header), or None for compressed uploads."""
+        if self.compressed:
+            return None
+        return max(self._scanner.records - 1, 0)
+
+    @property
+    def multiline(self):
+        """
+        True if a quoted field spans several lines, None for compressed uploads.
+        Such files cannot be split at line boundaries.
+        """
+        if self.compressed:
+            return None
+        return self._scanner.multiline
+
+    def info(self):
+        """Facts about the upload handed to import_products_task."""
+        return {'sha256': self.sha256, 'size': self.size, 'rows': self.rows, 'columns': self.columns,
+                'multiline': self.multiline}
+
+
+class UploadRequest(Request):
+    """Request class that spools CSV uploads directly into UPLOAD_FOLDER."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint != 'upload_csv':
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        upload_folder = current_app.config["UPLOAD_FOLDER"]
+        os.makedirs(upload_folder, exist_ok=True)
+        suffix = next((s for s in COMPRESSED_SUFFIXES if (filename or '').lower().endswith(s)), '')
+        filepath = os.path.join(upload_folder, f"{uuid.uuid4()}.csv{suffix}")
+        return UploadSpool(filepath, compressed=bool(suffix))
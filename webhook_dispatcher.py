@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+from datetime import datetime
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class WebhookDispatcher:
+    """
+    Delivers a payload to many webhook endpoints concurrently.
+    Uses a bounded thread pool, one keep-alive requests.Session per host and a
+    per-host concurrency limit, so one slow endpoint does not delay the others.
+
+    Deliveries are queued per host and drained by at most 'per_host_limit'
+    pool tasks per host, so pool threads only ever work on deliveries they
+    can send right away and never sit waiting for another host's limit.
+    """
+
+    def __init__(self, max_workers=16, per_host_limit=4, connect_timeout=3.0, read_timeout=10.0):
+        self.per_host_limit = per_host_limit
+        self.timeout = (connect_timeout, read_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='webhook')
+        self._sessions = {}
+        self._pending = defaultdict(deque)
+        self._draining = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        return urlsplit(url).netloc.lower()
+
+    def _session_for(self, host):
+        """Returns the pooled session of a host, creating it on first use."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host_limit)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def _deliver(self, session, webhook_id, url, payload, timeout):
+        triggered_at = datetime.utcnow()
+        try:
+            start_time = time.monotonic()
+            response = session.post(url, json=payload, timeout=timeout)
+            end_time = time.monotonic()
+            status_code = response.status_code
+            response_time = (end_time - start_time) * 1000 # in milliseconds
+        except requests.exceptions.RequestException as e:
+            status_code = 0 # Indicate a connection/request error
+            response_time = 0.0
+            print(f"Webhook send failed for {url}: {e}")
+        return {'webhook_id': webhook_id, 'url': url, 'status_code': status_code,
+                'response_time': response_time, 'triggered_at': triggered_at}
+
+    def _enqueue(self, host, delivery):
+        """Queues a delivery for 'host' and starts another drainer if the host is below its limit."""
+        with self._lock:
+            self._pending[host].append(delivery)
+            if self._draining[host] >= self.per_host_limit:
+                return
+            self._draining[host] += 1
+        self._executor.submit(self._drain, host)
+
+    def _drain(self, host):
+        """Sends the queued deliveries of one host until its queue is empty."""
+        session = self._session_for(host)
+        while True:
+            with self._lock:
+                if not self._pending[host]:
+                    self._draining[host] -= 1
+                    if not self._draining[host]:
+                        del self._pending[host], self._draining[host]
+                    return
+                webhook_id, url, payload, timeout, future = self._pending[host].popleft()
+            try:
+                future.set_result(self._deliver(session, webhook_id, url, payload, timeout))
+            except Exception as e:
+                future.set_exception(e)
+
+    def dispatch(self, targets, payload, timeout=None):
+        """
+        Posts 'payload' to every (webhook_id, url) target concurrently.
+        'timeout' overrides the read timeout for this dispatch (e.g. interactive tests).
+        Returns one result dict per target, in the same order.
+        """
+        if timeout is not None:
+            timeout = (self.timeout[0], timeout)
+        futures = []
+        for webhook_id, url in targets:
+            future = Future()
+            self._enqueue(self._host(url), (webhook_id, url, payload, timeout or self.timeout, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(config):
+    """Returns the process-wide dispatcher, built from the app config on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = WebhookDispatcher(
+                max_workers=config.get('WEBHOOK_MAX_WORKERS', 16),
+                per_host_limit=config.get('WEBHOOK_PER_HOST_LIMIT', 4),
+                connect_timeout=config.get('WEBHOOK_CONNECT_TIMEOUT', 3.0),
+                read_timeout=config.get('WEBHOOK_TIMEOUT', 10.0),
+            )
+        return _dispatcher
+
+
+def is_delivery_failure(status_code):
+    """
+    True for deliveries worth retrying: connection errors/timeouts (0),
+    408, 429 and 5xx. Other 4xx mean the endpoint is up but rejected the event.
+    """
+    return status_code == 0 or status_code in (408, 429) or status_code >= 500
+
+
+def retry_delay(attempt, base_delay, max_delay):
+    """
+    Seconds before retry number 'attempt' (1-based): exponential backoff capped
+    at 'max_delay', with jitter over the upper half so parked retries spread out.
+    """
+    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)